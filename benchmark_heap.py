@@ -0,0 +1,115 @@
+"""
+benchmark_heap.py - PriorityHeap vs IndexedPriorityHeap vs heapq
+Game of Thrones: Simulador Político
+
+Uso: python benchmark_heap.py [n_maximo]
+
+Carga de trabajo por tamaño n (la de un gestor de tareas con mucha repriorización):
+n inserciones, n/2 cambios de prioridad, n/4 eliminaciones y vaciado con pop.
+"heapq" usa la receta de la documentación (entradas marcadas como removidas),
+es decir, el mismo esquema perezoso que PriorityHeap pero con el heap en C.
+La columna "arreglo" es el tamaño del arreglo interno antes del vaciado.
+"""
+import heapq
+import itertools
+import random
+import sys
+import time
+
+from priority_heap import PriorityHeap, IndexedPriorityHeap
+
+
+class HeapqPerezoso:
+    """heapq con eliminación perezosa (receta de la documentación de Python)"""
+
+    _REMOVED = object()
+
+    def __init__(self):
+        self._heap = []
+        self._entry_finder = {}
+        self._counter = itertools.count()
+
+    def push(self, item, priority=0):
+        if item in self._entry_finder:
+            self.remove(item)
+        entry = [priority, next(self._counter), item]
+        self._entry_finder[item] = entry
+        heapq.heappush(self._heap, entry)
+
+    def remove(self, item):
+        entry = self._entry_finder.pop(item, None)
+        if entry is None:
+            return False
+        entry[2] = self._REMOVED
+        return True
+
+    def update_priority(self, item, priority):
+        self.push(item, priority)
+
+    def pop(self):
+        while self._heap:
+            _, _, item = heapq.heappop(self._heap)
+            if item is not self._REMOVED:
+                del self._entry_finder[item]
+                return item
+        return None
+
+
+IMPLEMENTACIONES = [
+    ("PriorityHeap", PriorityHeap, lambda h: len(h._heap)),
+    ("Indexed d=2", lambda: IndexedPriorityHeap(arity=2), lambda h: len(h._items)),
+    ("Indexed d=4", lambda: IndexedPriorityHeap(arity=4), lambda h: len(h._items)),
+    ("heapq", HeapqPerezoso, lambda h: len(h._heap)),
+]
+
+
+def carga(n: int, semilla: int = 42):
+    """Operaciones pregeneradas para que todas las implementaciones hagan lo mismo"""
+    rng = random.Random(semilla)
+    inserciones = [(i, rng.randrange(1000)) for i in range(n)]
+    cambios = [(rng.randrange(n), rng.randrange(1000)) for _ in range(n // 2)]
+    eliminaciones = rng.sample(range(n), n // 4)
+    return inserciones, cambios, eliminaciones
+
+
+def medir(fabrica, tam_arreglo, inserciones, cambios, eliminaciones):
+    """Segundos por fase (push, update, remove, pop) y tamaño del arreglo interno"""
+    heap = fabrica()
+    tiempos = []
+    t = time.perf_counter()
+    for item, prioridad in inserciones:
+        heap.push(item, prioridad)
+    tiempos.append(time.perf_counter() - t)
+
+    t = time.perf_counter()
+    for item, prioridad in cambios:
+        heap.update_priority(item, prioridad)
+    tiempos.append(time.perf_counter() - t)
+
+    t = time.perf_counter()
+    for item in eliminaciones:
+        heap.remove(item)
+    tiempos.append(time.perf_counter() - t)
+    arreglo = tam_arreglo(heap)
+
+    t = time.perf_counter()
+    while heap.pop() is not None:
+        pass
+    tiempos.append(time.perf_counter() - t)
+    return tiempos, arreglo
+
+
+def main_benchmark(n_maximo: int = 10 ** 6):
+    print(f"{'n':>9} {'Implementación':<14}{'push':>9}{'update':>9}{'remove':>9}{'pop':>9}{'total':>9}{'arreglo':>10}")
+    n = 10 ** 3
+    while n <= n_maximo:
+        operaciones = carga(n)
+        for nombre, fabrica, tam_arreglo in IMPLEMENTACIONES:
+            tiempos, arreglo = medir(fabrica, tam_arreglo, *operaciones)
+            fases = "".join(f"{t:>9.3f}" for t in tiempos)
+            print(f"{n:>9} {nombre:<14}{fases}{sum(tiempos):>9.3f}{arreglo:>10}")
+        n *= 10
+
+
+if __name__ == "__main__":
+    main_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10 ** 6)
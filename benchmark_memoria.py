@@ -0,0 +1,78 @@
+"""
+benchmark_memoria.py - Memoria por entidad con y sin __slots__
+Game of Thrones: Simulador Político
+
+Uso: python benchmark_memoria.py [cantidad]
+
+"Antes" se mide con una copia de cada clase sin __slots__ (los atributos
+vuelven a vivir en un __dict__ por instancia); "después" con la clase real.
+Los bytes incluyen todo lo que reserva el constructor (listas, strings, etc.).
+"""
+import os
+import sys
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from main import NPC, Estructura, Lesion, RelacionPersonal, DiplomaciaReino, Profesion
+from sistema_poblacion import PoblacionColumnar
+from sistemas_tareas import Tarea, TipoTarea
+from sistemas_animales import Animal, TipoAnimal
+from sistemas_agricultura import Campo, Rebano
+from sistemas_rebeliones import CasaMenor, TipoCasaMenor
+
+
+POLIGONO = [[0, 0], [100, 0], [100, 100], [0, 100]]
+
+
+def sin_slots(cls):
+    """Copia de la clase sin __slots__: mismos métodos, atributos en __dict__"""
+    excluir = set(cls.__slots__) | {"__slots__", "__dict__", "__weakref__"}
+    ns = {k: v for k, v in cls.__dict__.items() if k not in excluir}
+    return type(cls.__name__, cls.__bases__, ns)
+
+
+def medir(fabrica, cantidad: int) -> float:
+    """Bytes reservados por entidad al construir `cantidad` instancias"""
+    objetos = [None] * cantidad
+    tracemalloc.start()
+    inicio = tracemalloc.get_traced_memory()[0]
+    for i in range(cantidad):
+        objetos[i] = fabrica()
+    total = tracemalloc.get_traced_memory()[0] - inicio
+    tracemalloc.stop()
+    return total / cantidad
+
+
+def fabricas():
+    """(clase, constructor que recibe la clase) para cada entidad medida"""
+    return [
+        (NPC, lambda c: c("Jon", [Profesion.MINERO], 10, 10, 0, POLIGONO, None)),
+        (Estructura, lambda c: c("casa", 10, 10, 0)),
+        (Lesion, lambda c: c(NPC.poblacion, 0)),
+        (RelacionPersonal, lambda c: c(1, 2)),
+        (DiplomaciaReino, lambda c: c(0, 1)),
+        (Tarea, lambda c: c(TipoTarea.MINERIA, 5, 2)),
+        (Animal, lambda c: c(TipoAnimal.VACA, 10.0, 10.0)),
+        (Campo, lambda c: c(10.0, 10.0)),
+        (Rebano, lambda c: c(10.0, 10.0, "vaca")),
+        (CasaMenor, lambda c: c("Mormont", TipoCasaMenor.BANNERMAN, "Norte", "Stark")),
+    ]
+
+
+def main_benchmark(cantidad: int = 20000):
+    # Almacén de NPCs con capacidad de sobra para que su crecimiento no ensucie la medición
+    NPC.poblacion = PoblacionColumnar(capacidad=2 * cantidad + 1)
+
+    print(f"Memoria por entidad ({cantidad} instancias)")
+    print(f"{'Clase':<18}{'Antes (B)':>12}{'Después (B)':>14}{'Ahorro':>10}")
+    for cls, fabrica in fabricas():
+        con_dict = sin_slots(cls)
+        antes = medir(lambda: fabrica(con_dict), cantidad)
+        despues = medir(lambda: fabrica(cls), cantidad)
+        ahorro = 100.0 * (antes - despues) / antes if antes else 0.0
+        print(f"{cls.__name__:<18}{antes:>12.0f}{despues:>14.0f}{ahorro:>9.1f}%")
+
+
+if __name__ == "__main__":
+    main_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
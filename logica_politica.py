@@ -73,7 +73,7 @@ def actualizar_jerarquias_reinos(juego: 'JuegoGoT'):
         
         # Actualizar jerarquía
         if gobernante_npc:
-            juego.gestor_jerarquia.actualizar_reino(nombre_reino, npcs_reino, gobernante_npc)
+            juego.gestor_jerarquia.actualizar_reino(nombre_reino, npcs_reino, gobernante_npc, juego.semana_actual)
 
 
 # ============================================================================
@@ -84,35 +84,53 @@ def encontrar_heredero(juego: 'JuegoGoT', lord_fallecido: NPCGoT, casa_nombre: s
     """Encuentra el heredero legítimo de un lord fallecido"""
     from juego_got import agregar_mensaje
     
-    # 1. PRIORIDAD: Hijos varones del lord
-    hijos_varones = [
-        npc for npc in juego.npcs 
-        if npc.vivo and npc.padre_id == lord_fallecido.id and npc.sexo == Genero.MASCULINO
+    # Los nacimientos ocurren fuera de este módulo, así que primero se registran
+    # (y se ubican en las líneas) los NPCs que falten: una sola pasada
+    juego.gestor_jerarquia.sincronizar(juego.npcs, juego.semana_actual)
+    juego.gestor_jerarquia.registrar_npc(lord_fallecido)
+    
+    # 🚀 OPTIMIZACIÓN: si la línea de la casa se reconstruyó esta semana para este
+    # lord, el heredero ya está calculado (O(1)); si no, búsqueda completa
+    linea = juego.gestor_jerarquia.lineas.get(casa_nombre)
+    if linea is not None and linea.al_dia(lord_fallecido, juego.semana_actual):
+        heredero = linea.heredero()
+        if heredero is not None:
+            return heredero, linea.tipo_heredero()
+    
+    # Hijos y hermanos salen del índice genealógico (O(tamaño de la familia))
+    genealogia = juego.gestor_jerarquia.genealogia
+    hijos = [
+        npc for npc in genealogia.hijos(lord_fallecido.id)
+        if npc is not None and npc.vivo and npc.padre_id == lord_fallecido.id
     ]
     
+    # 1. PRIORIDAD: Hijos varones del lord
+    hijos_varones = [npc for npc in hijos if npc.sexo == Genero.MASCULINO]
+    
     if hijos_varones:
         # El hijo mayor hereda
         hijo_mayor = max(hijos_varones, key=lambda npc: npc.calcular_edad(juego.semana_actual))
         return hijo_mayor, "hijo_legitimo"
     
     # 2. Hijas mujeres (si no hay varones)
-    hijas = [
-        npc for npc in juego.npcs
-        if npc.vivo and npc.padre_id == lord_fallecido.id and npc.sexo == Genero.FEMENINO
-    ]
+    hijas = [npc for npc in hijos if npc.sexo == Genero.FEMENINO]
     
     if hijas:
         hija_mayor = max(hijas, key=lambda npc: npc.calcular_edad(juego.semana_actual))
         return hija_mayor, "hija_legitima"
     
-    # 3. Hermanos del lord fallecido
-    hermanos = [
-        npc for npc in juego.npcs
-        if npc.vivo and npc.casa == casa_nombre and 
-        npc.padre_id == lord_fallecido.padre_id and
-        npc.id != lord_fallecido.id and
-        npc.sexo == Genero.MASCULINO
-    ]
+    # 3. Hermanos del lord fallecido (sin padre conocido: los varones de la
+    # casa sin padre, igual que antes, así que se recorre juego.npcs)
+    def es_hermano(npc) -> bool:
+        return (npc is not None and npc.vivo and npc.casa == casa_nombre and
+                npc.padre_id == lord_fallecido.padre_id and
+                npc.id != lord_fallecido.id and
+                npc.sexo == Genero.MASCULINO)
+    
+    if lord_fallecido.padre_id is not None:
+        hermanos = [npc for npc in genealogia.hijos(lord_fallecido.padre_id) if es_hermano(npc)]
+    else:
+        hermanos = [npc for npc in juego.npcs if es_hermano(npc)]
     
     if hermanos:
         hermano_mayor = max(hermanos, key=lambda npc: npc.calcular_edad(juego.semana_actual))
@@ -196,6 +214,12 @@ def procesar_sucesion(juego: 'JuegoGoT', lord_fallecido: NPCGoT, casa_nombre: st
                 casa_menor.lord = heredero
             agregar_mensaje(juego, f"👑 {heredero.nombre} (pariente) reclama {casa_nombre}")
         
+        # Nueva línea de sucesión a partir del nuevo lord (su título cambió: se avisa
+        # a las demás líneas)
+        juego.gestor_jerarquia.notificar_cambio(heredero, juego.semana_actual)
+        miembros = [npc for npc in juego.npcs if npc.vivo and npc.casa == casa_nombre]
+        juego.gestor_jerarquia.establecer_lord_casa(casa_nombre, heredero, juego.semana_actual, miembros)
+        
         # Registrar en historia
         juego.gestor_continuidad.registrar_evento(
             juego.semana_actual, juego.año_actual,
@@ -268,6 +292,11 @@ def promover_casa_menor_a_principal(juego: 'JuegoGoT', casa_menor, casa_nombre_p
         # Establecer como lord
         nuevo_lord.titulo = TituloNoble.LORD if nuevo_lord.sexo == Genero.MASCULINO else TituloNoble.LADY
         juego.casas[casa_nombre_principal].lord = nuevo_lord
+        # Cambiaron de casa (y el lord de título): se recolocan en las demás líneas
+        for npc in npcs_casa_menor:
+            juego.gestor_jerarquia.notificar_cambio(npc, juego.semana_actual)
+        miembros = [npc for npc in juego.npcs if npc.vivo and npc.casa == casa_nombre_principal]
+        juego.gestor_jerarquia.establecer_lord_casa(casa_nombre_principal, nuevo_lord, juego.semana_actual, miembros)
         
         agregar_mensaje(juego, f"🔥⚔️ Casa {casa_menor.nombre} reclama Casa {casa_nombre_principal}!")
         agregar_mensaje(juego, f"👑 {nuevo_lord.nombre} es el nuevo Lord de Casa {casa_nombre_principal}")
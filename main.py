@@ -13,8 +13,10 @@ import time
 
 # ========== IMPORTACIONES DE SISTEMAS EXTERNOS ==========
 from priority_heap import PriorityHeap as ExternalPriorityHeap
-from sistemas_tareas import GestorTareas, TipoTarea, Tarea, EstadoCasa
+from sistemas_tareas import GestorTareas, TipoTarea, Tarea, EstadoCasa, OFICIO_A_TIPOTAREA
 from sistema_coordenadas import SistemaCoordenadas
+from sistema_espacial import GrillaEspacial
+from sistema_poblacion import PoblacionColumnar, ColumnaNPC, ColumnaContadaNPC, EstadoNPC, EnumColumnaNPC, IdOpcionalNPC
 
 pygame.init()
 
@@ -25,6 +27,13 @@ SPRITE_SIZE= 50
 numero_npc = 10
 CASTILLO = 100
 CASAS = 40
+PROB_BUSCAR_PAREJA = 0.04  # Probabilidad semanal de que un soltero adulto busque pareja
+TAM_CELDA_NPCS = 128  # Tamaño de celda de la grilla espacial de NPCs (unidades de mundo)
+DEBUG_AGREGADOS = False  # Contrasta los agregados O(1) de cada reino con un recorrido completo
+ASIGNACION_OPTIMA = True  # Reparte tareas por lotes de costo mínimo (caminata + oficio) en vez de FIFO
+INTERVALO_ASIGNACION = 0.5  # Segundos entre rondas de asignación (solo casas con ociosos o recursos nuevos)
+STAMINA_MINIMA_TAREA = 40  # Un NPC ocioso toma tarea solo con más stamina que esto (y quieto)
+RECUPERACION_STAMINA = 0.1 * FPS  # Stamina por segundo de un NPC quieto (0.1 por frame)
 
 # ============= CONFIGURACIÓN =============
 MAP_JSON = "exports/got_tiles.json"
@@ -291,17 +300,14 @@ PROFESSION_TO_FOLDER = {
 }
 
 # ============= MAPEO PROFESIÓN -> TIPOTAREA =============
-PROFESION_A_TIPOTAREA = {
-    Profesion.LENADOR: TipoTarea.CARPINTERIA,
-    Profesion.CONSTRUCTOR: TipoTarea.CONSTRUCCION,
-    Profesion.HERRERO: TipoTarea.HERRERIA,
-    Profesion.MILITAR: TipoTarea.ENTRENAMIENTO,
-    Profesion.MINERO: TipoTarea.MINERIA,
-    Profesion.AGRICULTOR: TipoTarea.AGRICULTURA,
-    Profesion.GANADERO: TipoTarea.CAZA,
-    Profesion.COMERCIANTE: TipoTarea.COMERCIO,
-    Profesion.PESCADOR: TipoTarea.PESCA,
-    Profesion.DIPLOMATA: TipoTarea.ADMINISTRACION,
+PROFESION_A_TIPOTAREA = {p: OFICIO_A_TIPOTAREA[p.value] for p in Profesion}
+
+# Estructuras del reino donde se hace cada tipo de tarea (el resto, en un punto del territorio)
+SITIOS_POR_TIPOTAREA = {
+    TipoTarea.AGRICULTURA: "sembradios",
+    TipoTarea.CAZA: "ganaderias",
+    TipoTarea.CONSTRUCCION: "casas",
+    TipoTarea.CARPINTERIA: "casas",
 }
 
 class EventoGlobal(Enum):
@@ -362,17 +368,33 @@ class EventoHistorico:
     descripcion: str
     tipo: TipoEvento
     importancia: int = 1
-    npcs_involucrados: List[str] = field(default_factory=list)
+    npcs_involucrados: List[int] = field(default_factory=list)
     reinos_involucrados: List[int] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
+class ResultadoSemanaReino:
+    """Lo que la fase paralela de un reino deja para la fase secuencial"""
+    reino_id: int
+    npcs_activos: int = 0
+    npcs_ociosos: int = 0
+    edificios_danados: int = 0
+    liberados: List[int] = field(default_factory=list)
+    eventos: List[EventoHistorico] = field(default_factory=list)
+
 class Lesion:
-    pie_roto: bool = False
-    brazo_roto: bool = False
-    enfermedad: bool = False
-    herida_grave: bool = False
-    embarazada: bool = False
-    meses_embarazo: int = 0
+    """Vista sobre las columnas de salud de un NPC (su fila en el almacén)"""
+    __slots__ = ("poblacion", "id")
+    
+    pie_roto = ColumnaNPC("pie_roto")
+    brazo_roto = ColumnaNPC("brazo_roto")
+    enfermedad = ColumnaNPC("enfermedad")
+    herida_grave = ColumnaNPC("herida_grave")
+    embarazada = ColumnaNPC("embarazada")
+    meses_embarazo = ColumnaNPC("meses_embarazo")
+    
+    def __init__(self, poblacion: PoblacionColumnar, fila: int):
+        self.poblacion = poblacion
+        self.id = fila
     
     def puede_caminar(self) -> bool:
         return not self.pie_roto
@@ -405,12 +427,16 @@ class Lesion:
 # ============= RELACIONES =============
 
 class RelacionPersonal:
-    def __init__(self, npc1_id: str, npc2_id: str):
+    # 🚀 OPTIMIZACIÓN: sin __dict__ por instancia (hay ~20 relaciones por NPC)
+    __slots__ = ("npc1_id", "npc2_id", "amistad", "romance", "enemistad", "ultima_semana")
+    
+    def __init__(self, npc1_id: int, npc2_id: int, semana: int = 0):
         self.npc1_id = npc1_id
         self.npc2_id = npc2_id
         self.amistad = random.uniform(0.3, 0.7)
         self.romance = random.uniform(0.0, 0.3) if random.random() < 0.3 else 0.0
         self.enemistad = 0.0
+        self.ultima_semana = semana  # Última semana con interacción
     
     def mejorar_relacion(self, cantidad: float = 0.1):
         self.amistad = min(1.0, self.amistad + cantidad)
@@ -420,38 +446,153 @@ class RelacionPersonal:
     
     def puede_reproducirse(self) -> bool:
         return self.romance > 0.8 and self.amistad > 0.7
+    
+    def fuerza(self) -> float:
+        return self.amistad + self.romance - self.enemistad
 
 class ArbolRelaciones:
-    def __init__(self):
-        self.relaciones: Dict[str, RelacionPersonal] = {}
-    
-    def get_key(self, id1: str, id2: str) -> str:
-        return f"{min(id1, id2)}_{max(id1, id2)}"
-    
-    def agregar_relacion(self, id1: str, id2: str):
+    """
+    Grafo de relaciones personales indexado por NPC.
+    
+    - vecinos: por cada NPC, sus relaciones (id del otro -> RelacionPersonal)
+    - fertiles: por cada NPC, los otros NPCs con los que puede_reproducirse()
+    
+    Las relaciones deben modificarse a través del árbol (mejorar_relacion)
+    para que el índice de parejas fértiles se mantenga al día.
+    
+    La memoria se mantiene acotada: quitar_npc borra las relaciones de los
+    muertos, decaer debilita y poda los lazos débiles (fuerza < umbral_debil) sin interacción, y cada
+    NPC conserva como máximo max_por_npc relaciones (se descarta la más débil).
+    
+    🚀 OPTIMIZACIÓN: las relaciones se agrupan por semana de última interacción, así
+    decaer solo revisa una vez las que acaban de quedar inactivas y luego solo
+    las débiles que siguen debilitándose (una inactiva fuerte no cambia hasta
+    volver a interactuar), nunca el grafo entero.
+    """
+    
+    def __init__(self, max_por_npc: int = 40, semanas_inactividad: int = 26,
+                 decaimiento: float = 0.01, umbral_debil: float = 0.5, umbral_poda: float = 0.2):
+        self.max_por_npc = max_por_npc
+        self.semanas_inactividad = semanas_inactividad
+        self.decaimiento = decaimiento
+        self.umbral_debil = umbral_debil
+        self.umbral_poda = umbral_poda
+        self.semana = 0
+        self.relaciones: Dict[Tuple[int, int], RelacionPersonal] = {}
+        self.vecinos: Dict[int, Dict[int, RelacionPersonal]] = defaultdict(dict)
+        self.fertiles: Dict[int, Dict[int, None]] = defaultdict(dict)  # dict como conjunto ordenado
+        # ultima_semana -> relaciones aún no revisadas por decaer
+        self.por_semana: Dict[int, Dict[Tuple[int, int], RelacionPersonal]] = defaultdict(dict)
+        self.decayendo: Dict[Tuple[int, int], RelacionPersonal] = {}  # inactivas y débiles
+        self.semana_revisada = -1  # Última semana de inactividad ya pasada a decayendo
+    
+    def get_key(self, id1: int, id2: int) -> Tuple[int, int]:
+        return (id1, id2) if id1 < id2 else (id2, id1)
+    
+    def agregar_relacion(self, id1: int, id2: int):
         key = self.get_key(id1, id2)
         if key not in self.relaciones:
-            self.relaciones[key] = RelacionPersonal(id1, id2)
+            for npc_id in (id1, id2):
+                vecinos = self.vecinos.get(npc_id)
+                if vecinos and len(vecinos) >= self.max_por_npc:
+                    self._quitar(min(vecinos.values(), key=RelacionPersonal.fuerza))
+            rel = RelacionPersonal(id1, id2, self.semana)
+            self.relaciones[key] = rel
+            self.por_semana[self.semana][key] = rel
+            self.vecinos[id1][id2] = rel
+            self.vecinos[id2][id1] = rel
+            self._indexar_fertilidad(rel)
+    
+    def get_relacion(self, id1: int, id2: int) -> Optional[RelacionPersonal]:
+        return self.vecinos.get(id1, {}).get(id2)
+    
+    def mejorar_relacion(self, id1: int, id2: int):
+        rel = self.get_relacion(id1, id2)
+        if rel:
+            rel.mejorar_relacion()
+            self._tocar(rel)
+            self._indexar_fertilidad(rel)
+    
+    def _tocar(self, rel: RelacionPersonal):
+        """Marca interacción esta semana: la relación vuelve al grupo de la semana actual"""
+        key = self.get_key(rel.npc1_id, rel.npc2_id)
+        self._olvidar_semana(key, rel)
+        rel.ultima_semana = self.semana
+        self.por_semana[self.semana][key] = rel
+    
+    def _olvidar_semana(self, key: Tuple[int, int], rel: RelacionPersonal):
+        """Saca la relación de su grupo por semana (o de las que decaen)"""
+        grupo = self.por_semana.get(rel.ultima_semana)
+        if grupo is not None:
+            grupo.pop(key, None)
+            if not grupo:
+                del self.por_semana[rel.ultima_semana]
+        self.decayendo.pop(key, None)
+    
+    def _indexar_fertilidad(self, rel: RelacionPersonal):
+        """Agrega o quita el par del índice de parejas fértiles según su estado actual"""
+        a, b = rel.npc1_id, rel.npc2_id
+        if rel.puede_reproducirse():
+            self.fertiles[a][b] = None
+            self.fertiles[b][a] = None
+        elif b in self.fertiles.get(a, ()):
+            del self.fertiles[a][b]
+            del self.fertiles[b][a]
+    
+    def _quitar(self, rel: RelacionPersonal):
+        a, b = rel.npc1_id, rel.npc2_id
+        key = self.get_key(a, b)
+        self.relaciones.pop(key, None)
+        self._olvidar_semana(key, rel)
+        for x, y in ((a, b), (b, a)):
+            vecinos = self.vecinos.get(x)
+            if vecinos is not None:
+                vecinos.pop(y, None)
+                if not vecinos:
+                    del self.vecinos[x]
+            fertiles = self.fertiles.get(x)
+            if fertiles is not None:
+                fertiles.pop(y, None)
+                if not fertiles:
+                    del self.fertiles[x]
+    
+    def quitar_npc(self, npc_id: int):
+        """Borra todas las relaciones de un NPC (muerte o retiro)"""
+        for rel in list(self.vecinos.get(npc_id, {}).values()):
+            self._quitar(rel)
+    
+    def decaer(self, semana: int):
+        """Debilita los lazos sin interacción reciente y poda los que quedan por debajo del umbral"""
+        self.semana = semana
+        limite = semana - self.semanas_inactividad
+        # Las que acaban de quedar inactivas se revisan una sola vez: las débiles
+        # pasan a decayendo; las fuertes no cambian sin interacción y se sueltan
+        for s in range(self.semana_revisada + 1, limite + 1):
+            for key, rel in self.por_semana.pop(s, {}).items():
+                if rel.fuerza() < self.umbral_debil:
+                    self.decayendo[key] = rel
+        self.semana_revisada = max(self.semana_revisada, limite)
+        
+        podar = []
+        for rel in self.decayendo.values():
+            rel.amistad = max(0.0, rel.amistad - self.decaimiento)
+            rel.romance = max(0.0, rel.romance - self.decaimiento)
+            if rel.fuerza() < self.umbral_poda:
+                podar.append(rel)
+            else:
+                self._indexar_fertilidad(rel)
+        for rel in podar:
+            self._quitar(rel)
     
-    def get_relacion(self, id1: str, id2: str) -> Optional[RelacionPersonal]:
-        return self.relaciones.get(self.get_key(id1, id2))
+    def get_vecinos(self, npc_id: int) -> Dict[int, RelacionPersonal]:
+        return self.vecinos.get(npc_id, {})
     
-    def mejorar_relacion(self, id1: str, id2: str):
-        key = self.get_key(id1, id2)
-        if key in self.relaciones:
-            self.relaciones[key].mejorar_relacion()
-    
-    def get_parejas_potenciales(self, npc_id: str) -> List[str]:
-        parejas = []
-        for rel in self.relaciones.values():
-            if rel.puede_reproducirse():
-                if rel.npc1_id == npc_id:
-                    parejas.append(rel.npc2_id)
-                elif rel.npc2_id == npc_id:
-                    parejas.append(rel.npc1_id)
-        return parejas
+    def get_parejas_potenciales(self, npc_id: int) -> List[int]:
+        return list(self.fertiles.get(npc_id, ()))
 
 class DiplomaciaReino:
+    __slots__ = ("reino1", "reino2", "relacion", "puntos_tension")
+    
     def __init__(self, reino1: int, reino2: int):
         self.reino1 = reino1
         self.reino2 = reino2
@@ -517,6 +658,41 @@ class AnimatedSpriteController:
     def get_current_frame(self, bank: SpriteBank, w: int, h: int) -> Optional[pygame.Surface]:
         return bank.get_seq_frame(self.folder, self.prefix, self.frame_idx, w, h)
 
+class RelojAnimacion:
+    """
+    Reloj global para las animaciones de NPCs.
+    
+    En vez de un controlador por NPC, el frame se deriva del tiempo acumulado:
+    un índice por (carpeta, fps) y por tick, más la fase propia de cada NPC.
+    Solo se calcula al dibujar, así que los NPCs fuera de pantalla no cuestan nada.
+    """
+    
+    def __init__(self):
+        self.tiempo = 0.0
+        self._indices: Dict[Tuple[str, float], int] = {}
+    
+    def avanzar(self, dt: float):
+        self.tiempo += dt
+        self._indices.clear()
+    
+    def indice(self, folder: str, fps: float) -> int:
+        """Frame base del grupo (carpeta, fps) en el tick actual"""
+        clave = (folder, fps)
+        idx = self._indices.get(clave)
+        if idx is None:
+            idx = int(self.tiempo * fps)
+            self._indices[clave] = idx
+        return idx
+
+_carpetas_animacion: Dict[str, bool] = {}
+
+def existe_carpeta_animacion(folder: str) -> bool:
+    """os.path.isdir cacheado: todos los NPCs de una profesión comparten carpeta"""
+    existe = _carpetas_animacion.get(folder)
+    if existe is None:
+        existe = _carpetas_animacion[folder] = os.path.isdir(folder)
+    return existe
+
 # ============= EFECTOS GLOBALES =============
 
 class GlobalEffect:
@@ -569,7 +745,8 @@ class GlobalEffect:
         else:
             pygame.draw.circle(screen, ROJO if self.type == "dragon" else CYAN, (wx, wy), int(10 * zoom))
 
-    def check_npc_impact(self, all_npcs: List['NPC'], reino_map: Dict[int, 'Reino']):
+    def check_npc_impact(self, all_npcs: List['NPC'], reino_map: Dict[int, 'Reino']) -> List['NPC']:
+        muertos = []
         for reino in reino_map.values():
             to_remove = []
             for npc in reino.todos_npcs:
@@ -578,21 +755,56 @@ class GlobalEffect:
                     to_remove.append(npc)
             for npc in to_remove:
                 reino.todos_npcs.remove(npc)
+            muertos.extend(to_remove)
+        return muertos
 
 # ============= NPC =============
 
 class NPC:
-    contador_id = 0
+    # Los atributos de movimiento no van aquí: son descriptores de columnas (ver más abajo)
+    __slots__ = ("id", "_tarea_actual", "nombre", "profesiones", "reino_nacimiento",
+                 "polygon", "bounding_rect", "tiles_map", "map_w", "map_h", "pad",
+                 "es_rey", "padre_id", "madre_id", "es_mestizo", "moral",
+                 "lesiones", "hijos_ids", "experiencia_guerra",
+                 "ultimo_evento", "color_base", "anim_folder", "anim_fase")
+    
+    # 🚀 OPTIMIZACIÓN: los atributos calientes viven en columnas de numpy (una fila por NPC)
+    # y se actualizan en bloque con PoblacionColumnar.tick
+    poblacion = PoblacionColumnar()
+    x = ColumnaNPC("x")
+    y = ColumnaNPC("y")
+    target_x = ColumnaNPC("target_x")
+    target_y = ColumnaNPC("target_y")
+    velocidad = ColumnaNPC("velocidad")
+    stamina = ColumnaNPC("stamina")
+    estado = EstadoNPC()
+    progreso_tarea = ColumnaNPC("progreso")
+    reino = ColumnaContadaNPC("reino")
+    is_task_path = ColumnaNPC("ruta_tarea")
+    fallos_movimiento = ColumnaNPC("fallos")
+    # Demografía: se avanza en bloque con PoblacionColumnar.avanzar_semana
+    edad = ColumnaContadaNPC("edad")
+    es_militar = ColumnaContadaNPC("militar")
+    genero = EnumColumnaNPC("genero", Genero)
+    estado_civil = EnumColumnaNPC("estado_civil", EstadoCivil)
+    pareja_id = IdOpcionalNPC("pareja")
+    hambre = ColumnaNPC("hambre")
+    estado_animo = ColumnaNPC("estado_animo")
+    dinero = ColumnaNPC("dinero")
+    trabajos_completados = ColumnaNPC("trabajos_completados")
+    semanas_trabajadas = ColumnaNPC("semanas_trabajadas")
     
     def __init__(self, nombre: str, profesiones: List[Profesion], x: int, y: int, reino: int, 
                  polygon: List[List[float]], tiles_map, genero: Genero = None, 
-                 padre_id: str = None, madre_id: str = None, es_rey: bool = False,
+                 padre_id: Optional[int] = None, madre_id: Optional[int] = None, es_rey: bool = False,
                  map_w: int = 1920, map_h: int = 1080, pad: int = 0):
-        self.id = f"npc_{NPC.contador_id}"
-        NPC.contador_id += 1
+        # Id denso: es la fila del NPC en el almacén columnar (sirve como índice de arrays)
+        self.id: int = NPC.poblacion.registrar(self)
+        self._tarea_actual: Optional[Tarea] = None
         
         self.nombre = nombre
         self.profesiones = profesiones
+        self.es_militar = Profesion.MILITAR in profesiones
         self.x = float(x)
         self.y = float(y)
         self.reino = reino
@@ -604,7 +816,7 @@ class NPC:
         self.map_h = map_h
         self.pad = pad
         self.genero = genero if genero else random.choice(list(Genero))
-        self.edad = 0 if padre_id else (random.randint(18, 60) if not es_rey else random.randint(30, 70))
+        self.edad = 0 if padre_id is not None else (random.randint(18, 60) if not es_rey else random.randint(30, 70))
         self.es_rey = es_rey
         
         self.padre_id = padre_id
@@ -614,10 +826,10 @@ class NPC:
         self.stamina = 100.0
         self.moral = random.uniform(0.5, 0.9)
         self.estado_animo = random.uniform(0.4, 0.8)
-        self.lesiones = Lesion()
+        self.lesiones = Lesion(NPC.poblacion, self.id)
         self.estado_civil = EstadoCivil.SOLTERO
-        self.pareja_id: Optional[str] = None
-        self.hijos_ids: List[str] = []
+        self.pareja_id: Optional[int] = None
+        self.hijos_ids: List[int] = []
         
         self.dinero = random.randint(5, 50)
         self.hambre = random.uniform(0.3, 0.8)
@@ -642,11 +854,11 @@ class NPC:
 
         self.color_base = self.get_color_profesion()
         
-        self.anim: Optional[AnimatedSpriteController] = None
+        # Animación: carpeta de sprites (None si no hay) y desfase propio sobre el RelojAnimacion global
         prof_folder = "king" if self.es_rey else PROFESSION_TO_FOLDER.get(self.profesiones[0], "miner")
-        self.anim_folder = os.path.join(ASSETS_DIR, "images", prof_folder)
-        if os.path.isdir(self.anim_folder):
-            self.anim = AnimatedSpriteController(self.anim_folder, "sprite_", fps=6.0)
+        anim_folder = os.path.join(ASSETS_DIR, "images", prof_folder)
+        self.anim_folder: Optional[str] = anim_folder if existe_carpeta_animacion(anim_folder) else None
+        self.anim_fase = random.randrange(64)
 
         # Asegurar posición inicial en tierra
         if not self._is_land(self.x, self.y):
@@ -671,6 +883,16 @@ class NPC:
         }
         return colores.get(self.profesiones[0], (200, 200, 200))
     
+    @property
+    def tarea_actual(self) -> Optional[Tarea]:
+        return self._tarea_actual
+    
+    @tarea_actual.setter
+    def tarea_actual(self, tarea: Optional[Tarea]):
+        """Mantiene sincronizadas las columnas de tarea del almacén"""
+        self._tarea_actual = tarea
+        NPC.poblacion.fijar_tarea(self.id, tarea.duracion_semanas if tarea else 0)
+    
     def puede_reproducirse(self) -> bool:
         if self.genero == Genero.MASCULINO:
             return self.edad >= 18 and self.edad < 70 and self.estado_civil == EstadoCivil.CASADO
@@ -679,69 +901,11 @@ class NPC:
                    self.estado_civil == EstadoCivil.CASADO and 
                    not self.lesiones.embarazada)
     
-    def avanzar_semana(self, todos_npcs: List['NPC'], arbol: ArbolRelaciones):
-        self.semanas_trabajadas += 1
-        eventos = []
-        
-        if self.lesiones.embarazada:
-            self.lesiones.meses_embarazo += 0.25
-            if self.lesiones.meses_embarazo >= 9:
-                return self._dar_a_luz(todos_npcs, arbol)
-        
-        if random.random() < 0.05:
-            self.edad += 1
-        
-        if self.edad > 70 and random.random() < 0.02:
-            evento = EventoHistorico(0, 0, f"{self.nombre} falleció a los {self.edad} años", 
-                                          TipoEvento.MUERTE, 3, [self.id], [self.reino])
-            eventos.append(evento)
-            return eventos
-        
-        self.hambre = max(0.0, self.hambre - random.uniform(0.05, 0.15))
-        self.stamina = min(100, self.stamina + 2)
-        
-        if self.lesiones.pie_roto and random.random() < 0.3:
-            self.lesiones.pie_roto = False
-        if self.lesiones.enfermedad and random.random() < 0.4:
-            self.lesiones.enfermedad = False
-        if random.random() < 0.05:
-            self.lesiones.enfermedad = True
-            self.estado_animo -= 0.2
-        
-        if self.estado_civil == EstadoCivil.SOLTERO and self.edad >= 18 and random.random() < 0.04:
-            parejas_pot = arbol.get_parejas_potenciales(self.id)
-            disponibles = [p for p in parejas_pot if any(n.id == p and n.estado_civil == EstadoCivil.SOLTERO and 
-                          n.genero != self.genero and n.edad >= 18 for n in todos_npcs)]
-            if disponibles:
-                pareja_id = random.choice(disponibles)
-                pareja = next((n for n in todos_npcs if n.id == pareja_id), None)
-                if pareja:
-                    self.estado_civil = EstadoCivil.CASADO
-                    self.pareja_id = pareja_id
-                    pareja.estado_civil = EstadoCivil.CASADO
-                    pareja.pareja_id = self.id
-                    evento = EventoHistorico(0, 0, f"{self.nombre} y {pareja.nombre} se casaron", 
-                                                  TipoEvento.BODA, 2, [self.id, pareja_id], [self.reino, pareja.reino])
-                    eventos.append(evento)
-        
-        if self.puede_reproducirse() and self.pareja_id and random.random() < 0.20:
-            pareja = next((n for n in todos_npcs if n.id == self.pareja_id), None)
-            if pareja and pareja.puede_reproducirse() and self.genero == Genero.FEMENINO:
-                self.lesiones.embarazada = True
-                self.lesiones.meses_embarazo = 0
-        
-        if self.trabajos_completados > 0:
-            ganancia = self.trabajos_completados * random.randint(5, 15)
-            self.dinero += ganancia
-        
-        self.trabajos_completados = 0
-        return eventos
-    
-    def _dar_a_luz(self, todos_npcs: List['NPC'], arbol: ArbolRelaciones):
+    def _dar_a_luz(self, registro: 'RegistroNPCs', arbol: ArbolRelaciones):
         self.lesiones.embarazada = False
         self.lesiones.meses_embarazo = 0
         
-        pareja = next((n for n in todos_npcs if n.id == self.pareja_id), None)
+        pareja = registro.get(self.pareja_id)
         if not pareja:
             return []
         
@@ -762,7 +926,7 @@ class NPC:
         
         self.hijos_ids.append(bebe.id)
         pareja.hijos_ids.append(bebe.id)
-        todos_npcs.append(bebe)
+        registro.registrar_nacimiento(bebe)
         
         evento = EventoHistorico(0, 0, f"Nació {nombre}", 
                                TipoEvento.NACIMIENTO, 3, [self.id, pareja.id, bebe.id], [self.reino])
@@ -811,66 +975,6 @@ class NPC:
             tries += 1
         return self.x, self.y
     
-    def actualizar(self, dt: float, bank: SpriteBank):
-        if self.anim:
-            moving = self.estado == "moving"
-            self.anim.fps = 6.0 if moving else 2.0
-            self.anim.update(dt, bank)
-        
-        if self.estado == "idle":
-            self.stamina = min(100, self.stamina + 0.1)
-            if random.random() < 0.01 and len(self.polygon) >= 3:
-                self.target_x, self.target_y = self._get_random_valid_target()
-                self.estado = "moving"
-                self.is_task_path = False
-        
-        elif self.estado == "moving":
-            dx = self.target_x - self.x
-            dy = self.target_y - self.y
-            dist = math.sqrt(dx*dx + dy*dy)
-            if dist < 5:
-                self.estado = "working" if self.tarea_actual else "idle"
-            else:
-                new_x = self.x + (dx / dist) * self.velocidad
-                new_y = self.y + (dy / dist) * self.velocidad
-                if self._is_land(new_x, new_y) and (len(self.polygon) < 3 or point_in_polygon((new_x, new_y), self.polygon)):
-                    self.x = new_x
-                    self.y = new_y
-                else:
-                    self.fallos_movimiento += 1
-                    if self.fallos_movimiento >= 5:  # Umbral para extremos
-                        # Reespawn aleatorio en reino (tierra + poly)
-                        self.x, self.y = find_random_point_in_polygon(self.bounding_rect, self.polygon, self.tiles_map, self.pad, self.map_w, self.map_h)
-                        self.target_x, self.target_y = self.x, self.y
-                        self.estado = "idle"
-                        self.fallos_movimiento = 0
-                        if self.tarea_actual:  # Si era task, falla y libera
-                            self.tarea_actual = None
-                            self.progreso_tarea = 0.0
-                        return False  # No completa nada
-                    else:
-                        self.target_x, self.target_y = self._get_random_valid_target()
-                        if math.hypot(self.target_x - self.x, self.target_y - self.y) < 5:
-                            self.estado = "idle"
-                            self.fallos_movimiento = 0
-
-        
-        elif self.estado == "working":
-            # Agrega al inicio del bloque (antes de if self.tarea_actual:):
-            if not self.tarea_actual:
-                self.estado = "idle"
-                return False
-            if self.tarea_actual:
-                # Incremento basado en duración de la tarea
-                incremento = dt / (self.tarea_actual.duracion_semanas * 7 * 0.1)  # Escala temporal
-                self.progreso_tarea += incremento
-                self.stamina = max(0, self.stamina - 0.05)
-                
-                if self.progreso_tarea >= 1.0:
-                    self.trabajos_completados += 1
-                    return True
-        return False
-    
     def terminar_trabajo(self):
         self.tarea_actual = None
         self.progreso_tarea = 0.0
@@ -878,19 +982,18 @@ class NPC:
         self.is_task_path = False
     
     def dibujar(self, screen: pygame.Surface, bank: SpriteBank, cam_x: int, cam_y: int, 
-                zoom: float, off_x: int, off_y: int):
+                zoom: float, off_x: int, off_y: int, reloj: RelojAnimacion):
+        # El culling lo hace Juego.dibujar consultando la grilla espacial
         wx = int((self.x - cam_x) * zoom) + off_x
         wy = int((self.y - cam_y) * zoom) + off_y
-        # Agrega este chequeo antes de cualquier dibujo:
-        dist_to_cam = math.hypot(self.x - cam_x, self.y - cam_y)
-        if dist_to_cam > max(ANCHO, ALTO) * zoom * 1.5: 
-            return  
 
         target_w = int(SPRITE_SIZE * zoom)
         target_h = int(SPRITE_SIZE * zoom)
         
-        if self.anim:
-            img = self.anim.get_current_frame(bank, target_w, target_h)
+        if self.anim_folder:
+            fps = 6.0 if self.estado == "moving" else 2.0
+            frame = reloj.indice(self.anim_folder, fps) + self.anim_fase
+            img = bank.get_seq_frame(self.anim_folder, "sprite_", frame, target_w, target_h)
             if img:
                 screen.blit(img, (wx - target_w//2, wy - target_h))
             else:
@@ -926,9 +1029,84 @@ class NPC:
             pygame.draw.line(screen, (255, 255, 0), (wx, wy), (tx, ty), int(2 * zoom))
             pygame.draw.circle(screen, (255, 255, 0), (tx, ty), int(10 * zoom))
 
+# ============= REGISTRO DE NPCS =============
+
+class RegistroNPCs:
+    """
+    Índice global de NPCs: id -> NPC, id -> reino e id -> nombre.
+    Los ids son densos, así que todo se guarda en listas indexadas por id.
+    """
+    
+    def __init__(self):
+        self.npcs: List[Optional[NPC]] = []   # None si el NPC murió
+        self.reino_de: List[int] = []         # -1 si el NPC murió
+        self.nombres: List[str] = []          # se conserva tras la muerte (genealogía, eventos)
+        self.vivos = 0
+        self.nacidos: List[NPC] = []
+    
+    def _reservar(self, npc_id: int):
+        faltan = npc_id + 1 - len(self.npcs)
+        if faltan > 0:
+            self.npcs.extend([None] * faltan)
+            self.reino_de.extend([-1] * faltan)
+            self.nombres.extend([""] * faltan)
+    
+    def registrar(self, npc: NPC):
+        self._reservar(npc.id)
+        if self.npcs[npc.id] is None:
+            self.vivos += 1
+        self.npcs[npc.id] = npc
+        self.reino_de[npc.id] = npc.reino
+        self.nombres[npc.id] = npc.nombre
+    
+    def registrar_nacimiento(self, bebe: NPC):
+        """Registra a un recién nacido; Juego lo incorpora a su reino al cerrar la semana"""
+        self.registrar(bebe)
+        self.nacidos.append(bebe)
+    
+    def tomar_nacidos(self) -> List[NPC]:
+        nacidos, self.nacidos = self.nacidos, []
+        return nacidos
+    
+    def retirar(self, npc_id: int) -> Optional[NPC]:
+        npc = self.get(npc_id)
+        if npc is not None:
+            self.npcs[npc_id] = None
+            self.reino_de[npc_id] = -1
+            self.vivos -= 1
+        return npc
+    
+    def get(self, npc_id: Optional[int]) -> Optional[NPC]:
+        if npc_id is None or not 0 <= npc_id < len(self.npcs):
+            return None
+        return self.npcs[npc_id]
+    
+    def reino(self, npc_id: int) -> Optional[int]:
+        if self.get(npc_id) is None:
+            return None
+        return self.reino_de[npc_id]
+    
+    def nombre(self, npc_id: int) -> str:
+        """Nombre para mostrar (también de NPCs ya fallecidos)"""
+        if 0 <= npc_id < len(self.nombres) and self.nombres[npc_id]:
+            return self.nombres[npc_id]
+        return f"npc_{npc_id}"
+    
+    def __contains__(self, npc_id: int) -> bool:
+        return self.get(npc_id) is not None
+    
+    def __len__(self) -> int:
+        return self.vivos
+
 # ============= ESTRUCTURAS =============
 
 class Estructura:
+    __slots__ = ("tipo", "x", "y", "reino", "reino_original", "hp", "hp_max",
+                 "_destruida", "nivel_produccion", "animales")
+    
+    # Estructuras destruidas por reino (el de origen, dueño de las listas): lectura O(1)
+    destruidas_por_reino: Dict[int, int] = defaultdict(int)
+    
     def __init__(self, tipo: str, x: int, y: int, reino: int):
         self.tipo = tipo
         self.x = x
@@ -937,10 +1115,21 @@ class Estructura:
         self.reino_original = reino
         self.hp = 100
         self.hp_max = 100
-        self.destruida = False
+        self._destruida = False
         self.nivel_produccion = 100 if tipo in ["sembradio", "ganaderia"] else 0
         self.animales = 10 if tipo == "ganaderia" else 0
     
+    @property
+    def destruida(self) -> bool:
+        return self._destruida
+    
+    @destruida.setter
+    def destruida(self, valor: bool):
+        """Mantiene el contador de destruidas de su reino"""
+        if valor != self._destruida:
+            Estructura.destruidas_por_reino[self.reino_original] += 1 if valor else -1
+            self._destruida = valor
+    
     def recibir_dano(self, dano: int):
         self.hp -= dano
         if self.hp <= 0:
@@ -1116,16 +1305,86 @@ class Reino:
             return 0
         poder = self.poder_militar
         poder += self.almacen.recursos.get(TipoRecurso.ARMAS, 0) * 2
-        militares = sum(1 for npc in self.todos_npcs if Profesion.MILITAR in npc.profesiones and npc.edad >= 14)
-        poder += militares * 5
+        poder += self.militares() * 5
         return poder
     
+    # ========== AGREGADOS O(1) ==========
+    # Los mantienen PoblacionColumnar (tareas, edad, reino, profesión, muertes) y
+    # Estructura.destruida; con DEBUG_AGREGADOS se contrastan con el recorrido completo
+    
+    def _verificado(self, valor: int, recorrido) -> int:
+        if DEBUG_AGREGADOS:
+            esperado = recorrido()
+            assert valor == esperado, f"{self.nombre}: agregado {valor} != recorrido {esperado}"
+        return valor
+    
+    def militares(self) -> int:
+        """Militares adultos del reino"""
+        return self._verificado(int(NPC.poblacion.militares_reino[self.id]), lambda: sum(
+            1 for npc in self.todos_npcs if Profesion.MILITAR in npc.profesiones and npc.edad >= 14))
+    
+    def npcs_con_tarea(self) -> int:
+        """NPCs del reino con una tarea asignada"""
+        return self._verificado(int(NPC.poblacion.con_tarea_reino[self.id]), lambda: sum(
+            1 for npc in self.todos_npcs if npc.tarea_actual))
+    
+    def npcs_ociosos(self) -> int:
+        """NPCs adultos del reino sin tarea"""
+        return self._verificado(int(NPC.poblacion.ociosos_reino[self.id]), lambda: sum(
+            1 for npc in self.todos_npcs if not npc.tarea_actual and npc.edad >= 14))
+    
+    def edificios_danados(self) -> int:
+        """Estructuras destruidas del reino"""
+        return self._verificado(Estructura.destruidas_por_reino[self.id], lambda: sum(
+            1 for e in self.get_todas_estructuras() if e.destruida))
+    
     # ========== INTEGRACIÓN SISTEMA DE TAREAS ==========
     def sincronizar_recursos(self):
         """Sincroniza recursos entre almacén antiguo y nuevo sistema"""
         self.comida = self.almacen.recursos.get(TipoRecurso.ALIMENTO, 0)
         self.madera = self.almacen.recursos.get(TipoRecurso.MADERA, 0)
         self.oro += self.almacen.recursos.get(TipoRecurso.PIEDRA, 0) * 2  # Conversión piedra->oro
+    
+    def avanzar_semana(self, rng: random.Random, semana: int, dia: int) -> ResultadoSemanaReino:
+        """
+        Fase semanal propia del reino: recursos, recuento de la casa, tareas terminadas
+        y producción pasiva. Solo toca el estado de este reino y usa su propio RNG,
+        así que puede correr en paralelo con los demás reinos.
+        """
+        self.sincronizar_recursos()
+        resultado = ResultadoSemanaReino(self.id)
+        resultado.npcs_activos = self.npcs_con_tarea()
+        resultado.npcs_ociosos = self.npcs_ociosos()
+        resultado.edificios_danados = self.edificios_danados()
+        
+        # Procesar tareas completadas
+        for npc in self.todos_npcs:
+            if npc.tarea_actual and npc.tarea_actual.completada:
+                tarea = npc.tarea_actual
+                
+                # Aplicar recompensas
+                self.oro += tarea.oro_ganado
+                self.almacen.agregar(TipoRecurso.ALIMENTO, tarea.comida_ganada)
+                self.almacen.agregar(TipoRecurso.MADERA, tarea.madera_ganada)
+                
+                # Log de producción
+                if tarea.oro_ganado > 0 or tarea.comida_ganada > 0 or tarea.madera_ganada > 0:
+                    resultado.eventos.append(EventoHistorico(
+                        semana, dia,
+                        f"{self.nombre}: +{tarea.oro_ganado} oro +{tarea.comida_ganada} comida +{tarea.madera_ganada} madera",
+                        TipoEvento.PRODUCCION, 1, [], [self.id]
+                    ))
+                
+                # Liberar NPC (el gestor de tareas se entera en la fase secuencial)
+                npc.terminar_trabajo()
+                resultado.liberados.append(npc.id)
+        
+        # Generar recursos pasivos
+        if not self.derrotado and len(self.polygon) > 0:
+            for rec in [TipoRecurso.MADERA, TipoRecurso.PIEDRA, TipoRecurso.HIERRO]:
+                self.almacen.agregar(rec, rng.randint(10, 20))
+            self.almacen.agregar(TipoRecurso.ALIMENTO, rng.randint(15, 30))
+        return resultado
     # ===================================================
     
     def recibir_ataque(self, fuerza: int, atacante: 'Reino') -> Dict:
@@ -1355,11 +1614,23 @@ class Juego:
         scale_x = self.map_w / data["mapa_w"]
         scale_y = self.map_h / data["mapa_h"]
         
+        # Almacén de NPCs y agregados por reino propios de esta partida (son de clase:
+        # otra partida en el mismo proceso no debe heredar filas ni contadores)
+        NPC.poblacion = PoblacionColumnar()
+        Estructura.destruidas_por_reino = defaultdict(int)
+        
+        # Semilla de la partida (sale del random global: con random.seed fijo, todo es reproducible)
+        self.semilla = random.getrandbits(32)
+        NPC.poblacion.sembrar(self.semilla)
+        
         self.sistema_diplomatico = SistemaDiplomatico(7)
         self.arbol_relaciones = ArbolRelaciones()
         
         # ========== INTEGRACIÓN SISTEMA DE TAREAS ==========
-        self.gestor_tareas = GestorTareas()
+        self.gestor_tareas = GestorTareas(asignacion_optima=ASIGNACION_OPTIMA,
+                                          ubicador=self._ubicar_tarea,
+                                          posicion_npc=self._posicion_npc,
+                                          descanso_restante=self._descanso_restante)
         # ===================================================
         
         self.reinos: List[Reino] = []
@@ -1373,16 +1644,35 @@ class Juego:
                           self.map_w, self.map_h, self.pad)
             self.reinos.append(reino)
             self.reino_map[i] = reino
+        self.reino_por_nombre: Dict[str, Reino] = {r.nombre: r for r in self.reinos}
+        
+        # Máscaras de tierra y de reinos para el paso vectorizado de movimiento
+        NPC.poblacion.configurar_mapa(self.tiles_map, self.pad, self.map_w, self.map_h,
+                                      {r.id: r.polygon for r in self.reinos}, self.world_w, self.world_h)
         
         # ========== INTEGRACIÓN SISTEMA DE TAREAS ==========
-        # Registrar oficios de todos los NPCs en el índice
+        # Registrar oficios de todos los NPCs en el índice, y a los adultos como ociosos
         for reino in self.reinos:
             for npc in reino.todos_npcs:
                 if npc.profesiones:
-                    self.gestor_tareas.registrar_oficio_npc(int(npc.id.split('_')[1]), npc.profesiones[0].value)
+                    self.gestor_tareas.registrar_oficio_npc(npc.id, npc.profesiones[0].value)
+                if npc.edad >= 14 and not npc.tarea_actual:
+                    self.gestor_tareas.registrar_npc_ocioso(npc.id, reino.nombre)
+        self.reloj_asignacion = INTERVALO_ASIGNACION  # La primera ronda corre en el primer frame
+        self.tiempo_tareas = 0.0  # Segundos de juego sin pausa (hora de los descansos)
         # ===================================================
         
         todos = [npc for r in self.reinos for npc in r.todos_npcs]
+        
+        self.registro_npcs = RegistroNPCs()
+        for npc in todos:
+            self.registro_npcs.registrar(npc)
+        
+        # Grilla espacial de NPCs para culling del viewport y selección con el ratón
+        self.indice_npcs = GrillaEspacial(TAM_CELDA_NPCS)
+        for npc in todos:
+            self.indice_npcs.insertar(npc.id, npc.x, npc.y, npc)
+        
         for i, npc1 in enumerate(todos):
             for npc2 in todos[i+1:i+20]:
                 self.arbol_relaciones.agregar_relacion(npc1.id, npc2.id)
@@ -1396,6 +1686,7 @@ class Juego:
         }
         
         self.active_effects: List[GlobalEffect] = []
+        self.reloj_animacion = RelojAnimacion()
         
         self.cam_x = (self.world_w - ANCHO) // 2
         self.cam_y = (self.world_h - ALTO) // 2
@@ -1461,15 +1752,65 @@ class Juego:
             effect.update(dt)
             if effect.time_active > effect.duration:
                 to_remove.append(effect)
-            effect.check_npc_impact([n for r in self.reinos for n in r.todos_npcs], self.reino_map)
+            for npc in effect.check_npc_impact([n for r in self.reinos for n in r.todos_npcs], self.reino_map):
+                self._retirar_npc(npc)
         for eff in to_remove:
             self.active_effects.remove(eff)
     
+    def _retirar_npc(self, npc: NPC):
+        """Quita a un NPC muerto de los índices y libera su fila en el almacén"""
+        self.registro_npcs.retirar(npc.id)
+        self.arbol_relaciones.quitar_npc(npc.id)
+        self.indice_npcs.remover(npc.id)
+        self.gestor_tareas.remover_npc(npc.id)
+        NPC.poblacion.liberar(npc.id)
+    
+    def _incorporar_npc(self, npc: NPC):
+        """Agrega un NPC (p. ej. un recién nacido) a su reino y a los índices"""
+        self.reino_map[npc.reino].todos_npcs.append(npc)
+        self.registro_npcs.registrar(npc)
+        self.indice_npcs.insertar(npc.id, npc.x, npc.y, npc)
+        if npc.profesiones:
+            self.gestor_tareas.registrar_oficio_npc(npc.id, npc.profesiones[0].value)
+    
+    def _ubicar_tarea(self, casa: str, tipo: TipoTarea) -> Tuple[int, int]:
+        """Punto del reino donde se hace una tarea: su estructura si tiene, si no un punto del territorio"""
+        reino = self.reino_por_nombre.get(casa)
+        if reino is None or len(reino.polygon) < 3:
+            return 0, 0
+        sitios = getattr(reino, SITIOS_POR_TIPOTAREA.get(tipo, ""), None)
+        if sitios:
+            sitio = random.choice(sitios)
+            return int(sitio.x), int(sitio.y)
+        # 🚀 OPTIMIZACIÓN: muestreo vectorizado sobre la máscara rasterizada del reino
+        punto = NPC.poblacion.punto_en_reino(reino.id)
+        return punto if punto is not None else reino.centroid
+    
+    def _posicion_npc(self, npc_id: int) -> Tuple[float, float]:
+        """Posición actual de un NPC leída del almacén columnar"""
+        return NPC.poblacion.x[npc_id], NPC.poblacion.y[npc_id]
+    
+    def _descanso_restante(self, npc_id: int) -> float:
+        """
+        Regla de descanso: segundos que le faltan a un NPC para tomar tarea (0 = ya).
+        Solo toma tarea quieto y con stamina > STAMINA_MINIMA_TAREA; si está en
+        movimiento se vuelve a mirar en la próxima ronda
+        """
+        npc = NPC.poblacion.npcs[npc_id]
+        if npc is None:
+            return 0.0
+        falta = STAMINA_MINIMA_TAREA - npc.stamina
+        if npc.estado == "idle":
+            return 0.0 if falta < 0 else falta / RECUPERACION_STAMINA + 1 / FPS
+        return max(falta / RECUPERACION_STAMINA, INTERVALO_ASIGNACION)
+    
     def probar_estres(self):
         ociosos = [npc for r in self.reinos for npc in r.todos_npcs if not npc.tarea_actual and npc.stamina > 40]
         for npc in ociosos[:100]:  # Asigna a max 100 ociosos
-            # Genera tarea manual/simple (e.g., TipoTarea.MINERIA con random pos)
-            tarea = Tarea(TipoTarea.MINERIA, prioridad=1, duracion_semanas=1, ubicacion=(random.randint(0, self.map_w), random.randint(0, self.map_h)))
+            # Genera tarea manual/simple (TipoTarea.MINERIA en un punto de SU reino)
+            reino = self.reino_map[npc.reino]
+            tarea = Tarea(TipoTarea.MINERIA, prioridad=1, duracion_semanas=1, casa=reino.nombre,
+                          ubicacion=self._ubicar_tarea(reino.nombre, TipoTarea.MINERIA))
             npc.asignar_tarea(tarea)
         self.panel_actividades.agregar_log(f"Prueba de estrés: {min(100, len(ociosos))} tareas forzadas")
     
@@ -1478,74 +1819,63 @@ class Juego:
         self.dia_actual += 7
         
         eventos_semana: List[EventoHistorico] = []
-        todos_npcs = [npc for r in self.reinos for npc in r.todos_npcs]
-        
-        for reino in self.reinos:
-            npcs_vivos = []
-            for npc in list(reino.todos_npcs):
-                resultados = npc.avanzar_semana(todos_npcs, self.arbol_relaciones)
-                if resultados:
-                    for evento in resultados:
-                        if isinstance(evento, EventoHistorico):
-                            evento.semana = self.semana_actual
-                            evento.dia = self.dia_actual
-                            eventos_semana.append(evento)
-                
-                if npc.edad < 100:
-                    npcs_vivos.append(npc)
-            reino.todos_npcs = npcs_vivos
+        # 🚀 OPTIMIZACIÓN: la demografía de toda la población es un paso vectorizado
+        # sobre las columnas; solo los partos y las muertes vuelven a Python
+        poblacion = NPC.poblacion
+        partos, fallecidos = poblacion.avanzar_semana()
+        for fila in partos:
+            eventos_semana.extend(poblacion.npcs[fila]._dar_a_luz(self.registro_npcs, self.arbol_relaciones))
+        for fila in fallecidos:
+            npc = poblacion.npcs[fila]
+            eventos_semana.append(EventoHistorico(0, 0, f"{npc.nombre} falleció a los {npc.edad} años", 
+                                                  TipoEvento.MUERTE, 3, [npc.id], [npc.reino]))
+        # Los que llegaron a adultos entran al conjunto de ociosos de su casa
+        for fila in poblacion.adultos_nuevos:
+            npc = poblacion.npcs[fila]
+            if not npc.tarea_actual:
+                self.gestor_tareas.registrar_npc_ocioso(npc.id, self.reino_map[npc.reino].nombre)
+        for evento in eventos_semana:
+            evento.semana = self.semana_actual
+            evento.dia = self.dia_actual
+        
+        ancianos = [poblacion.npcs[fila] for fila in poblacion.filas_con_edad(100)]
+        if ancianos:
+            retirados = set()
+            for npc in ancianos:
+                retirados.add(npc.id)
+                self._retirar_npc(npc)
+            for reino_id in {npc.reino for npc in ancianos}:
+                reino = self.reino_map[reino_id]
+                reino.todos_npcs = [npc for npc in reino.todos_npcs if npc.id not in retirados]
+        
+        for bebe in self.registro_npcs.tomar_nacidos():
+            self._incorporar_npc(bebe)
+        
+        self.arbol_relaciones.decaer(self.semana_actual)
+        
+        for evento in self.emparejar_solteros():
+            evento.semana = self.semana_actual
+            evento.dia = self.dia_actual
+            eventos_semana.append(evento)
         
         # ========== INTEGRACIÓN SISTEMA DE TAREAS ==========
-        # Actualizar progreso de tareas y procesar completadas
+        # Fase por reino (cada uno con su RNG sembrado por semilla, reino y semana:
+        # no depende del orden ni de los demás reinos) y fusión en orden de reino
         for reino in self.reinos:
-            reino.sincronizar_recursos()
-            
-            # Actualizar estado de la casa en el gestor
-            npcs_activos = sum(1 for npc in reino.todos_npcs if npc.tarea_actual)
-            npcs_ociosos = sum(1 for npc in reino.todos_npcs if not npc.tarea_actual and npc.edad >= 14)
-            edificios_danados = sum(1 for e in reino.get_todas_estructuras() if e.destruida)
-            
+            rng = random.Random(f"{self.semilla}:{reino.id}:{self.semana_actual}")
+            resultado = reino.avanzar_semana(rng, self.semana_actual, self.dia_actual)
             self.gestor_tareas.actualizar_estado_casa(
                 casa=reino.nombre,
                 oro=reino.oro,
                 comida=reino.comida,
                 soldados=reino.soldados,
-                npcs_activos=npcs_activos,
-                npcs_ociosos=npcs_ociosos,
-                edificios_danados=edificios_danados
+                npcs_activos=resultado.npcs_activos,
+                npcs_ociosos=resultado.npcs_ociosos,
+                edificios_danados=resultado.edificios_danados
             )
-            
-            # Procesar tareas completadas
-            for npc in reino.todos_npcs:
-                if npc.tarea_actual and npc.tarea_actual.completada:
-                    tarea = npc.tarea_actual
-                    
-                    # Aplicar recompensas
-                    reino.oro += tarea.oro_ganado
-                    reino.almacen.agregar(TipoRecurso.ALIMENTO, tarea.comida_ganada)
-                    reino.almacen.agregar(TipoRecurso.MADERA, tarea.madera_ganada)
-                    
-                    # Log de producción
-                    if tarea.oro_ganado > 0 or tarea.comida_ganada > 0 or tarea.madera_ganada > 0:
-                        eventos_semana.append(EventoHistorico(
-                            self.semana_actual, self.dia_actual,
-                            f"{reino.nombre}: +{tarea.oro_ganado} oro +{tarea.comida_ganada} comida +{tarea.madera_ganada} madera",
-                            TipoEvento.PRODUCCION, 1, [], [reino.id]
-                        ))
-                    
-                    # Liberar NPC
-                    npc.terminar_trabajo()
-                    npc_id_int = int(npc.id.split('_')[1])
-                    self.gestor_tareas.registrar_npc_ocioso(npc_id_int)
-        
-        # Generar recursos pasivos
-        for reino in self.reinos:
-            if reino.derrotado or len(reino.polygon) == 0:
-                continue
-            for rec in [TipoRecurso.MADERA, TipoRecurso.PIEDRA, TipoRecurso.HIERRO]:
-                cantidad = random.randint(10, 20)
-                reino.almacen.agregar(rec, cantidad)
-            reino.almacen.agregar(TipoRecurso.ALIMENTO, random.randint(15, 30))
+            for npc_id in resultado.liberados:
+                self.gestor_tareas.registrar_npc_ocioso(npc_id, reino.nombre)
+            eventos_semana.extend(resultado.eventos)
         # ===================================================
         
         self.actualizar_diplomacia(eventos_semana)
@@ -1560,6 +1890,37 @@ class Juego:
         
         self.pantalla_eventos.activar(eventos_semana)
     
+    def emparejar_solteros(self) -> List[EventoHistorico]:
+        """
+        Etapa semanal de bodas para toda la población.
+        Junta los pares (soltero que busca pareja, candidato fértil) de cada reino,
+        los ordena por afinidad y los empareja de forma voraz: O(E log E) en los pares.
+        """
+        arbol = self.arbol_relaciones
+        pares: List[Tuple[float, NPC, NPC]] = []
+        poblacion = NPC.poblacion
+        for fila in poblacion.solteros_buscando(PROB_BUSCAR_PAREJA):
+            npc = poblacion.npcs[fila]
+            for otro_id in arbol.get_parejas_potenciales(npc.id):
+                otro = self.registro_npcs.get(otro_id)
+                if (otro and otro.estado_civil == EstadoCivil.SOLTERO and 
+                        otro.genero != npc.genero and otro.edad >= 18):
+                    rel = arbol.get_relacion(npc.id, otro_id)
+                    pares.append((rel.romance + rel.amistad, npc, otro))
+        
+        pares.sort(key=lambda par: par[0], reverse=True)
+        eventos = []
+        for _, npc, pareja in pares:
+            if npc.estado_civil != EstadoCivil.SOLTERO or pareja.estado_civil != EstadoCivil.SOLTERO:
+                continue
+            npc.estado_civil = EstadoCivil.CASADO
+            npc.pareja_id = pareja.id
+            pareja.estado_civil = EstadoCivil.CASADO
+            pareja.pareja_id = npc.id
+            eventos.append(EventoHistorico(0, 0, f"{npc.nombre} y {pareja.nombre} se casaron", 
+                                           TipoEvento.BODA, 2, [npc.id, pareja.id], [npc.reino, pareja.reino]))
+        return eventos
+    
     def get_descripcion_evento_global(self, evento: EventoGlobal) -> str:
         descripciones = {
             EventoGlobal.LLUVIA: "Lluvias benefician cultivos",
@@ -1624,32 +1985,21 @@ class Juego:
         if self.pausado:
             return
         
-        # Crear diccionario de casas para validación de recursos
-        casas_dict = {reino.nombre: reino for reino in self.reinos}
+        # 🚀 OPTIMIZACIÓN: sin recorrer NPCs; los ociosos entran a la cola por eventos
+        # (terminar o perder una tarea, llegar a adulto) y solo se procesan
+        # las casas con ociosos o recursos nuevos
+        casas_dict = self.reino_por_nombre
         
-        for reino in self.reinos:
-            if reino.derrotado or len(reino.polygon) == 0:
-                continue
-            
-            # Identificar NPCs ociosos
-            npcs_ociosos_ids = []
-            for npc in reino.todos_npcs:
-                if npc.edad >= 14 and not npc.tarea_actual and npc.estado == "idle" and npc.stamina > 40:
-                    npc_id_int = int(npc.id.split('_')[1])
-                    npcs_ociosos_ids.append(npc_id_int)
-            
-            if not npcs_ociosos_ids:
+        for casa in self.gestor_tareas.tomar_casas_pendientes():
+            reino = casas_dict.get(casa)
+            if reino is None or reino.derrotado or len(reino.polygon) == 0:
                 continue
             
-            # Forzar asignación completa
-            asignaciones = self.gestor_tareas.forzar_asignacion_completa(
-                npcs_ociosos_ids, 
-                reino.nombre,
-                casas_dict
-            )
+            # Genera las tareas que falten y asigna los ociosos de la casa
+            asignaciones = self.gestor_tareas.asignar_casa(casa, casas_dict)
             
             # Aplicar asignaciones
-            for npc_id_int, tarea, mensaje_error in asignaciones:
+            for npc_id, tarea, mensaje_error in asignaciones:
                 if tarea is None:
                     # Tarea rechazada por falta de recursos
                     if mensaje_error:
@@ -1657,21 +2007,34 @@ class Juego:
                     continue
                 
                 # Encontrar NPC correspondiente
-                npc_id_str = f"npc_{npc_id_int}"
-                npc = next((n for n in reino.todos_npcs if n.id == npc_id_str), None)
+                npc = self.registro_npcs.get(npc_id)
                 
-                if npc:
-                    # Consumir recursos de la tarea
-                    self.gestor_tareas.consumir_recursos_tarea(tarea, reino)
-                    
-                    # Asignar tarea al NPC
-                    npc.asignar_tarea(tarea)
-                    
-                    # Log de asignación
-                    self.panel_actividades.agregar_log(
-                        f"{npc.nombre}: {tarea.tipo.value}"
-                    )
-                    self.tareas_asignadas_tiempo += 1
+                if not npc or self.registro_npcs.reino(npc_id) != reino.id:
+                    # Murió o cambió de reino: la tarea vuelve a pendientes y el NPC
+                    # sale del gestor o espera en la cola de su casa actual
+                    self.gestor_tareas.fallar_tarea(npc_id)
+                    if not npc:
+                        self.gestor_tareas.remover_npc(npc_id)
+                    else:
+                        actual = self.reino_map[self.registro_npcs.reino(npc_id)]
+                        self.gestor_tareas.registrar_npc_ocioso(npc_id, actual.nombre)
+                    continue
+                
+                # Consumir recursos de la tarea
+                self.gestor_tareas.consumir_recursos_tarea(tarea, reino)
+                
+                # Asignar tarea al NPC
+                npc.asignar_tarea(tarea)
+                
+                # Log de asignación
+                self.panel_actividades.agregar_log(
+                    f"{npc.nombre}: {tarea.tipo.value}"
+                )
+                self.tareas_asignadas_tiempo += 1
+            
+            # Si asignó y todavía quedan ociosos (tope de tareas por ronda), vuelve en la próxima
+            if any(tarea is not None for _, tarea, _ in asignaciones) and self.gestor_tareas.npcs_ociosos(casa):
+                self.gestor_tareas.marcar_casa(casa)
     # ===================================================
     
     def get_castillo_en_pos(self, x: int, y: int) -> Optional[Estructura]:
@@ -1784,14 +2147,23 @@ class Juego:
         off_x = (ANCHO - int(vw * scale)) // 2
         off_y = (ALTO - int(vh * scale)) // 2
         
-        for reino in self.reinos:
-            for npc in reino.todos_npcs:
-                npc_x = int((npc.x - self.cam_x) * self.zoom) + off_x
-                npc_y = int((npc.y - self.cam_y) * self.zoom) + off_y
-                dist = math.sqrt((npc_x - x)**2 + (npc_y - y)**2)
-                if dist <= int(15 * self.zoom):
-                    return npc
-        return None
+        # Radio de selección en píxeles convertido a unidades de mundo
+        radio = int(15 * self.zoom) / max(self.zoom, 1e-6)
+        mundo_x = (x - off_x) / self.zoom + self.cam_x
+        mundo_y = (y - off_y) / self.zoom + self.cam_y
+        candidatos = self.indice_npcs.consultar_radio(mundo_x, mundo_y, radio)
+        if not candidatos:
+            return None
+        return min(candidatos, key=lambda n: (n.x - mundo_x)**2 + (n.y - mundo_y)**2)
+    
+    def viewport_mundo(self, off_x: int, off_y: int, margen: float = 0) -> Tuple[float, float, float, float]:
+        """Rectángulo del mundo visible en pantalla (x_min, y_min, x_max, y_max)"""
+        zoom = max(self.zoom, 1e-6)
+        x_min = self.cam_x - off_x / zoom - margen
+        y_min = self.cam_y - off_y / zoom - margen
+        x_max = self.cam_x + (ANCHO - off_x) / zoom + margen
+        y_max = self.cam_y + (ALTO - off_y) / zoom + margen
+        return x_min, y_min, x_max, y_max
     
     def actualizar(self):
         dt = self.clock.tick(FPS) / 1000.0
@@ -1824,41 +2196,67 @@ class Juego:
         
         if not self.pausado and not self.pantalla_eventos.activa:
             # ========== INTEGRACIÓN SISTEMA DE TAREAS ==========
-            # Asignar tareas inteligentemente cada 10 segundos
-            if int(pygame.time.get_ticks() / 10000) % 1 == 0:
-                self.asignar_tareas_inteligentes()
+            # Asignar tareas cada INTERVALO_ASIGNACION, y solo si alguna casa tiene novedades
+            # (antes la condición era siempre verdadera y se recorría a todos los NPCs por frame)
+            self.reloj_asignacion += dt
+            self.tiempo_tareas += dt
+            if self.reloj_asignacion >= INTERVALO_ASIGNACION:
+                self.reloj_asignacion = 0.0
+                # Los que descansaron lo suficiente vuelven a la cola de su casa
+                self.gestor_tareas.despertar_descansados(self.tiempo_tareas)
+                if self.gestor_tareas.casas_pendientes:
+                    self.asignar_tareas_inteligentes()
             # ===================================================
             
+            # 🚀 OPTIMIZACIÓN: movimiento y trabajo de todos los NPCs en un solo paso vectorizado
+            self.reloj_animacion.avanzar(dt)
+            poblacion = NPC.poblacion
             for reino in self.reinos:
-                if reino.derrotado or len(reino.polygon) == 0:
-                    continue
-                for npc in reino.todos_npcs:
-                    if npc.actualizar(dt, self.sprite_bank):
-                        # ========== INTEGRACIÓN SISTEMA DE TAREAS ==========
-                        if npc.tarea_actual:
-                            tarea = npc.tarea_actual
-                            
-                            # Marcar como completada
-                            tarea.completada = True
-                            tarea.progreso = 1.0
-                            
-                            # Aplicar recompensas inmediatamente
-                            reino.oro += tarea.oro_ganado
-                            reino.almacen.agregar(TipoRecurso.ALIMENTO, tarea.comida_ganada)
-                            reino.almacen.agregar(TipoRecurso.MADERA, tarea.madera_ganada)
-                            
-                            # Completar en el gestor
-                            npc_id_int = int(npc.id.split('_')[1])
-                            self.gestor_tareas.completar_tarea(npc_id_int)
-                            
-                            # Log de producción
-                            if tarea.oro_ganado > 0 or tarea.comida_ganada > 0 or tarea.madera_ganada > 0:
-                                self.panel_actividades.agregar_log(
-                                    f"{npc.nombre}: Recolectó +{tarea.oro_ganado} oro +{tarea.comida_ganada} comida +{tarea.madera_ganada} madera"
-                                )
-                        # ===================================================
-                        
-                        npc.terminar_trabajo()
+                poblacion.reino_activo[reino.id] = not (reino.derrotado or len(reino.polygon) == 0)
+            completadas, fallidas = poblacion.tick(dt)
+            
+            # Reaparecidos tras bloquearse: pierden la tarea (vuelve a pendientes) y quedan ociosos
+            for fila in fallidas:
+                npc = poblacion.npcs[fila]
+                npc.tarea_actual = None
+                self.gestor_tareas.fallar_tarea(npc.id)
+                self.gestor_tareas.registrar_npc_ocioso(npc.id, self.reino_map[npc.reino].nombre)
+            
+            # La grilla solo se toca para los NPCs que cruzaron de celda
+            for fila in poblacion.cambios_de_celda(TAM_CELDA_NPCS):
+                npc = poblacion.npcs[fila]
+                self.indice_npcs.mover(npc.id, npc.x, npc.y, npc)
+            
+            for fila in completadas:
+                npc = poblacion.npcs[fila]
+                reino = self.reino_map[npc.reino]
+                npc.trabajos_completados += 1
+                # ========== INTEGRACIÓN SISTEMA DE TAREAS ==========
+                if npc.tarea_actual:
+                    tarea = npc.tarea_actual
+                    
+                    # Marcar como completada
+                    tarea.completada = True
+                    tarea.progreso = 1.0
+                    
+                    # Aplicar recompensas inmediatamente
+                    reino.oro += tarea.oro_ganado
+                    reino.almacen.agregar(TipoRecurso.ALIMENTO, tarea.comida_ganada)
+                    reino.almacen.agregar(TipoRecurso.MADERA, tarea.madera_ganada)
+                    
+                    # Completar en el gestor
+                    self.gestor_tareas.completar_tarea(npc.id)
+                    
+                    # Log de producción
+                    if tarea.oro_ganado > 0 or tarea.comida_ganada > 0 or tarea.madera_ganada > 0:
+                        self.panel_actividades.agregar_log(
+                            f"{npc.nombre}: Recolectó +{tarea.oro_ganado} oro +{tarea.comida_ganada} comida +{tarea.madera_ganada} madera"
+                        )
+                # ===================================================
+                
+                npc.terminar_trabajo()
+                # Vuelve a la cola de su casa actual (también si la tarea no era del gestor)
+                self.gestor_tareas.registrar_npc_ocioso(npc.id, reino.nombre)
     
     def dibujar(self):
         self.cam_x, self.cam_y, vw, vh = clamp_camera(self.cam_x, self.cam_y, self.zoom, 
@@ -1895,15 +2293,21 @@ class Juego:
                            self.zoom, off_x, off_y, reino.color)
                 # Contador de tareas en castillos
                 if est.tipo == "castillo":
-                    num_tareas = sum(1 for npc in reino.todos_npcs if npc.tarea_actual)
+                    num_tareas = reino.npcs_con_tarea()
                     texto_tareas = self.font.render(str(num_tareas), True, BLANCO)
                     self.screen.blit(texto_tareas, (int((est.x - self.cam_x) * self.zoom) + off_x - 10, int((est.y - self.cam_y) * self.zoom) + off_y - 50))
         
-        for reino in self.reinos:
-            for npc in reino.todos_npcs:
-                if npc.edad >= 14 or self.zoom > 1.5:
-                    npc.dibujar(self.screen, self.sprite_bank, self.cam_x, self.cam_y, 
-                               self.zoom, off_x, off_y)
+        # Solo se dibujan los NPCs que la grilla devuelve dentro del viewport
+        x_min, y_min, x_max, y_max = self.viewport_mundo(off_x, off_y, margen=SPRITE_SIZE)
+        visibles = self.indice_npcs.consultar_rect(x_min, y_min, x_max, y_max)
+        # Mismo orden que recorrer reino por reino sus todos_npcs: las listas solo
+        # crecen al final y los ids (filas del almacén) no se reutilizan
+        orden_reino = {reino.id: i for i, reino in enumerate(self.reinos)}
+        visibles.sort(key=lambda n: (orden_reino[n.reino], n.id))
+        for npc in visibles:
+            if npc.edad >= 14 or self.zoom > 1.5:
+                npc.dibujar(self.screen, self.sprite_bank, self.cam_x, self.cam_y, 
+                           self.zoom, off_x, off_y, self.reloj_animacion)
         
         self.dibujar_ui()
         if self.mostrar_panel_npc:
@@ -4,7 +4,7 @@ priority_heap.py - Sistema de gestión de prioridades
 Implementa un Min-Heap completamente desde cero
 """
 
-from typing import Any, List, Tuple, Optional
+from typing import Any, Iterable, Iterator, List, Tuple, Optional
 from dataclasses import dataclass, field
 
 
@@ -19,6 +19,53 @@ class PriorityItem:
         return f"PriorityItem(priority={self.priority}, item={self.item})"
 
 
+class _Frontera:
+    """
+    Min-heap binario mínimo sobre tuplas (sin heapq).
+    Guarda la frontera de nodos candidatos al recorrer otro heap en orden:
+    para los k primeros solo contiene O(k) nodos, no el heap entero.
+    """
+    __slots__ = ("_datos",)
+    
+    def __init__(self):
+        self._datos: List[tuple] = []
+    
+    def __len__(self) -> int:
+        return len(self._datos)
+    
+    def push(self, valor: tuple):
+        datos = self._datos
+        datos.append(valor)
+        i = len(datos) - 1
+        while i > 0:
+            padre = (i - 1) >> 1
+            if datos[padre] <= valor:
+                break
+            datos[i] = datos[padre]
+            i = padre
+        datos[i] = valor
+    
+    def pop(self) -> tuple:
+        datos = self._datos
+        primero = datos[0]
+        ultimo = datos.pop()
+        if datos:
+            n = len(datos)
+            i = 0
+            while True:
+                hijo = 2 * i + 1
+                if hijo >= n:
+                    break
+                if hijo + 1 < n and datos[hijo + 1] < datos[hijo]:
+                    hijo += 1
+                if ultimo <= datos[hijo]:
+                    break
+                datos[i] = datos[hijo]
+                i = hijo
+            datos[i] = ultimo
+        return primero
+
+
 class PriorityHeap:
     """
     🧠 HEAP DE PRIORIDAD PROPIO - Sin librerías externas
@@ -29,15 +76,24 @@ class PriorityHeap:
     - Heapify Down (Bubble Down) - O(log n)
     - Inserción - O(log n)
     - Extracción - O(log n)
+    - Inserción en bloque (Heapify de Floyd) - O(n)
     
     Prioridad más baja = más importante (se procesa primero)
+    
+    Las eliminaciones son perezosas (marcas); cuando las marcas superan
+    `compaction_ratio` veces los elementos vivos, el arreglo se compacta.
     """
     
-    def __init__(self):
+    MIN_DEAD_TO_COMPACT = 32  # Con menos marcas no vale la pena reconstruir
+    
+    def __init__(self, compaction_ratio: float = 1.0):
         self._heap: List[PriorityItem] = []
         self._counter: int = 0
         self._entry_finder: dict = {}
         self._REMOVED = '<removed-task>'
+        self._compaction_ratio = compaction_ratio
+        self._dead: int = 0  # Marcas de removido que siguen dentro de _heap
+        self._compactions: int = 0
     
     # ========== ALGORITMOS PROPIOS DEL HEAP ==========
     
@@ -123,6 +179,30 @@ class PriorityHeap:
         # Heapify down desde la raíz
         self._heapify_down(0)
     
+    def _discard_removed_root(self):
+        """🧹 Saca de la raíz las marcas de removido"""
+        while self._heap and self._heap[0].item is self._REMOVED:
+            self._extract_root()
+            self._dead -= 1
+    
+    def _heapify(self):
+        """🏗️ ALGORITMO PROPIO: HEAPIFY DE FLOYD - O(n), de abajo hacia arriba"""
+        for index in range(len(self._heap) // 2 - 1, -1, -1):
+            self._heapify_down(index)
+    
+    def _maybe_compact(self):
+        """Compacta si las marcas superan el umbral respecto de los vivos"""
+        if (self._dead >= self.MIN_DEAD_TO_COMPACT and
+                self._dead > self._compaction_ratio * len(self._entry_finder)):
+            self.compact()
+    
+    def compact(self):
+        """🧹 Quita todas las marcas de removido y reconstruye el heap en O(n)"""
+        self._heap = [entry for entry in self._heap if entry.item is not self._REMOVED]
+        self._heapify()
+        self._dead = 0
+        self._compactions += 1
+    
     # ========== OPERACIONES PÚBLICAS ==========
     
     def push(self, item: Any, priority: int = 0):
@@ -144,6 +224,35 @@ class PriorityHeap:
         # 🔥 Heapify up propio
         self._heapify_up(len(self._heap) - 1)
     
+    def push_many(self, items: Iterable[Tuple[Any, int]]):
+        """
+        ➕ INSERCIÓN EN BLOQUE
+        Agrega pares (item, priority). Si el bloque es grande frente al heap,
+        reconstruye con el heapify de Floyd (O(n), aprovechando para compactar);
+        si es chico, inserta uno por uno (O(k log n)).
+        """
+        items = list(items)
+        if not items:
+            return
+        total = len(self._heap) + len(items)
+        if len(items) * max(1, total.bit_length()) < total:
+            for item, priority in items:
+                self.push(item, priority)
+            return
+        
+        for item, priority in items:
+            if item in self._entry_finder:
+                self._entry_finder.pop(item).item = self._REMOVED
+                self._dead += 1
+            self._counter += 1
+            entry = PriorityItem(priority=priority, item=item, counter=self._counter)
+            self._heap.append(entry)
+            self._entry_finder[item] = entry
+        if self._dead:
+            self.compact()
+        else:
+            self._heapify()
+    
     def pop(self) -> Optional[Any]:
         """
         ⬆️ EXTRACCIÓN PROPIA
@@ -151,8 +260,7 @@ class PriorityHeap:
         Retorna None si el heap está vacío
         """
         # Limpiar elementos removidos
-        while self._heap and self._heap[0].item is self._REMOVED:
-            self._extract_root()
+        self._discard_removed_root()
         
         if not self._heap:
             return None
@@ -173,13 +281,17 @@ class PriorityHeap:
         👁️ VER MÍNIMO
         Retorna elemento de mayor prioridad sin extraerlo
         """
-        while self._heap and self._heap[0].item is self._REMOVED:
-            self._extract_root()
+        self._discard_removed_root()
         
         if self._heap:
             return self._heap[0].item
         return None
     
+    def peek_priority(self) -> Optional[int]:
+        """👁️ Prioridad del siguiente elemento sin extraerlo - O(1) amortizado"""
+        self._discard_removed_root()
+        return self._heap[0].priority if self._heap else None
+    
     def remove(self, item: Any) -> bool:
         """
         🗑️ ELIMINACIÓN PROPIA
@@ -190,10 +302,11 @@ class PriorityHeap:
         
         entry = self._entry_finder.pop(item)
         entry.item = self._REMOVED
+        self._dead += 1
         
         # Si está en la raíz, limpiar inmediatamente
-        if self._heap and self._heap[0].item is self._REMOVED:
-            self._extract_root()
+        self._discard_removed_root()
+        self._maybe_compact()
         
         return True
     
@@ -228,6 +341,16 @@ class PriorityHeap:
         self._heap.clear()
         self._entry_finder.clear()
         self._counter = 0
+        self._dead = 0
+    
+    def get_stats(self) -> dict:
+        """📊 Contadores para monitoreo: vivos, marcas, compactaciones y tamaño del arreglo"""
+        return {
+            "live": len(self._entry_finder),
+            "dead": self._dead,
+            "compactions": self._compactions,
+            "array": len(self._heap),
+        }
     
     def get_all_items(self) -> List[Tuple[Any, int]]:
         """
@@ -243,10 +366,41 @@ class PriorityHeap:
         items.sort(key=lambda x: x[1])
         return items
     
+    def iter_ordered(self) -> Iterator[Tuple[Any, int]]:
+        """
+        🔎 RECORRIDO ORDENADO PEREZOSO
+        Genera (item, priority) de mayor a menor prioridad sin modificar el heap:
+        avanza por el árbol con una frontera de candidatos, así que los primeros
+        k elementos cuestan O(k log k). No modificar el heap mientras se recorre.
+        """
+        heap = self._heap
+        frontera = _Frontera()
+        if heap:
+            frontera.push((heap[0].priority, heap[0].counter, 0))
+        while frontera:
+            _, _, index = frontera.pop()
+            entry = heap[index]
+            if entry.item is not self._REMOVED:
+                yield entry.item, entry.priority
+            # Las marcas de removido no se emiten, pero sus hijos sí se exploran
+            for hijo in (2 * index + 1, 2 * index + 2):
+                if hijo < len(heap):
+                    frontera.push((heap[hijo].priority, heap[hijo].counter, hijo))
+    
+    def nsmallest(self, n: int) -> List[Tuple[Any, int]]:
+        """Los n elementos de mayor prioridad como (item, priority), sin ordenar todo el heap"""
+        resultado = []
+        if n <= 0:
+            return resultado
+        for par in self.iter_ordered():
+            resultado.append(par)
+            if len(resultado) >= n:
+                break
+        return resultado
+    
     def get_top_n(self, n: int) -> List[Any]:
         """Retorna los n elementos de mayor prioridad"""
-        all_items = self.get_all_items()
-        return [item for item, _ in all_items[:n]]
+        return [item for item, _ in self.nsmallest(n)]
     
     def __len__(self) -> int:
         return self.size()
@@ -258,13 +412,220 @@ class PriorityHeap:
         return self.contains(item)
     
     def __repr__(self) -> str:
-        items = self.get_all_items()
-        items_str = ", ".join([f"{item}({priority})" for item, priority in items[:5]])
-        if len(items) > 5:
-            items_str += f"... (+{len(items) - 5} más)"
+        # Solo los 5 primeros: loguear el heap nunca ordena todo el arreglo
+        items = self.nsmallest(5)
+        items_str = ", ".join([f"{item}({priority})" for item, priority in items])
+        if self.size() > 5:
+            items_str += f"... (+{self.size() - 5} más)"
         return f"PriorityHeap([{items_str}])"
 
 
+class IndexedPriorityHeap:
+    """
+    🧠 HEAP D-ARIO INDEXADO - Sin librerías externas
+    Cada elemento conoce su posición en el arreglo, así que:
+    - update_priority sube o baja el elemento en su sitio - O(log_d n)
+    - remove es una eliminación real, sin marcas perezosas - O(d log_d n)
+    - el arreglo nunca crece por repriorizar: mide siempre lo mismo que size()
+    
+    Aridad configurable (4 por defecto: árbol más bajo y hermanos contiguos).
+    Misma interfaz que PriorityHeap; a igual prioridad sale primero el más antiguo.
+    """
+    
+    def __init__(self, arity: int = 4):
+        if arity < 2:
+            raise ValueError("La aridad del heap debe ser al menos 2")
+        self._d = arity
+        self._keys: List[Tuple[int, int]] = []  # (prioridad, contador) por posición
+        self._items: List[Any] = []
+        self._pos: dict = {}  # item -> posición en el arreglo
+        self._counter: int = 0
+    
+    # ========== ALGORITMOS PROPIOS DEL HEAP ==========
+    
+    def _sift_up(self, index: int):
+        """⬆️ Sube el elemento de `index` (mueve huecos en vez de hacer swaps)"""
+        keys, items, pos, d = self._keys, self._items, self._pos, self._d
+        key, item = keys[index], items[index]
+        while index > 0:
+            parent = (index - 1) // d
+            if keys[parent] <= key:
+                break
+            keys[index] = keys[parent]
+            items[index] = items[parent]
+            pos[items[index]] = index
+            index = parent
+        keys[index] = key
+        items[index] = item
+        pos[item] = index
+    
+    def _sift_down(self, index: int):
+        """⬇️ Baja el elemento de `index` hacia el menor de sus d hijos"""
+        keys, items, pos, d = self._keys, self._items, self._pos, self._d
+        n = len(keys)
+        key, item = keys[index], items[index]
+        while True:
+            first = d * index + 1
+            if first >= n:
+                break
+            best = first
+            best_key = keys[first]
+            for child in range(first + 1, min(first + d, n)):
+                if keys[child] < best_key:
+                    best = child
+                    best_key = keys[child]
+            if key <= best_key:
+                break
+            keys[index] = best_key
+            items[index] = items[best]
+            pos[items[index]] = index
+            index = best
+        keys[index] = key
+        items[index] = item
+        pos[item] = index
+    
+    def _take_last(self, index: int):
+        """Tapa el hueco de `index` con el último elemento y lo reubica"""
+        last_key = self._keys.pop()
+        last_item = self._items.pop()
+        if index == len(self._keys):
+            return
+        self._keys[index] = last_key
+        self._items[index] = last_item
+        self._pos[last_item] = index
+        if index > 0 and last_key < self._keys[(index - 1) // self._d]:
+            self._sift_up(index)
+        else:
+            self._sift_down(index)
+    
+    # ========== OPERACIONES PÚBLICAS ==========
+    
+    def push(self, item: Any, priority: int = 0):
+        """➕ Inserta el elemento (si ya estaba, actualiza su prioridad en su sitio)"""
+        if item in self._pos:
+            self.update_priority(item, priority)
+            return
+        self._counter += 1
+        self._keys.append((priority, self._counter))
+        self._items.append(item)
+        self._sift_up(len(self._keys) - 1)
+    
+    def pop(self) -> Optional[Any]:
+        """⬆️ Extrae el elemento de mayor prioridad (None si está vacío)"""
+        if not self._items:
+            return None
+        item = self._items[0]
+        del self._pos[item]
+        self._take_last(0)
+        return item
+    
+    def peek(self) -> Optional[Any]:
+        """👁️ Elemento de mayor prioridad sin extraerlo"""
+        return self._items[0] if self._items else None
+    
+    def peek_priority(self) -> Optional[int]:
+        """👁️ Prioridad del siguiente elemento sin extraerlo - O(1)"""
+        return self._keys[0][0] if self._keys else None
+    
+    def remove(self, item: Any) -> bool:
+        """🗑️ Eliminación real en O(log n)"""
+        index = self._pos.pop(item, None)
+        if index is None:
+            return False
+        self._take_last(index)
+        return True
+    
+    def update_priority(self, item: Any, new_priority: int):
+        """🔄 Cambia la prioridad en el lugar (decrease/increase-key)"""
+        index = self._pos.get(item)
+        if index is None:
+            self.push(item, new_priority)
+            return
+        # Contador nuevo: como en PriorityHeap, queda detrás de sus iguales
+        self._counter += 1
+        old_key = self._keys[index]
+        new_key = (new_priority, self._counter)
+        self._keys[index] = new_key
+        if new_key < old_key:
+            self._sift_up(index)
+        else:
+            self._sift_down(index)
+    
+    def contains(self, item: Any) -> bool:
+        """Verifica si elemento está en el heap"""
+        return item in self._pos
+    
+    def get_priority(self, item: Any) -> Optional[int]:
+        """Obtiene prioridad de un elemento"""
+        index = self._pos.get(item)
+        return None if index is None else self._keys[index][0]
+    
+    def is_empty(self) -> bool:
+        """Verifica si el heap está vacío"""
+        return not self._items
+    
+    def size(self) -> int:
+        """Retorna número de elementos"""
+        return len(self._items)
+    
+    def clear(self):
+        """Limpia todos los elementos"""
+        self._keys.clear()
+        self._items.clear()
+        self._pos.clear()
+        self._counter = 0
+    
+    def get_all_items(self) -> List[Tuple[Any, int]]:
+        """Todos los elementos como (item, priority), de mayor a menor prioridad"""
+        orden = sorted(range(len(self._keys)), key=self._keys.__getitem__)
+        return [(self._items[i], self._keys[i][0]) for i in orden]
+    
+    def iter_ordered(self) -> Iterator[Tuple[Any, int]]:
+        """🔎 Genera (item, priority) en orden sin modificar el heap (frontera de candidatos)"""
+        keys = self._keys
+        d = self._d
+        frontera = _Frontera()
+        if keys:
+            frontera.push((keys[0], 0))
+        while frontera:
+            key, index = frontera.pop()
+            yield self._items[index], key[0]
+            primero = d * index + 1
+            for hijo in range(primero, min(primero + d, len(keys))):
+                frontera.push((keys[hijo], hijo))
+    
+    def nsmallest(self, n: int) -> List[Tuple[Any, int]]:
+        """Los n elementos de mayor prioridad como (item, priority), sin ordenar todo el heap"""
+        resultado = []
+        if n <= 0:
+            return resultado
+        for par in self.iter_ordered():
+            resultado.append(par)
+            if len(resultado) >= n:
+                break
+        return resultado
+    
+    def get_top_n(self, n: int) -> List[Any]:
+        """Retorna los n elementos de mayor prioridad"""
+        return [item for item, _ in self.nsmallest(n)]
+    
+    def __len__(self) -> int:
+        return self.size()
+    
+    def __bool__(self) -> bool:
+        return not self.is_empty()
+    
+    def __contains__(self, item: Any) -> bool:
+        return self.contains(item)
+    
+    def __repr__(self) -> str:
+        items = self.nsmallest(5)
+        items_str = ", ".join([f"{item}({priority})" for item, priority in items])
+        if self.size() > 5:
+            items_str += f"... (+{self.size() - 5} más)"
+        return f"IndexedPriorityHeap(d={self._d}, [{items_str}])"
+
+
 # 🧪 Ejemplo de uso y pruebas
 if __name__ == "__main__":
     print("🔥 PRIORITY HEAP - 100% PROPIO (SIN HEAPQ)")
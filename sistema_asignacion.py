@@ -0,0 +1,64 @@
+"""
+sistema_asignacion.py - Asignación óptima NPC <-> tarea
+Game of Thrones: Simulador Político
+
+Resuelve el problema de asignación de costo mínimo (método húngaro, versión
+de caminos de aumento más cortos con potenciales). Las filas son NPCs y las
+columnas tareas; cada fila recibe a lo sumo una columna y viceversa.
+El lazo interno sobre columnas está vectorizado con numpy: O(n² · m) en
+operaciones pero solo O(n²) llamadas, así que lotes de ~64 x 64 son baratos.
+"""
+from typing import List, Tuple
+
+import numpy as np
+
+
+def asignar_minimo_costo(costos: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Pares (fila, columna) que minimizan la suma de costos.
+    Si la matriz es rectangular se asignan min(filas, columnas) pares.
+    """
+    costos = np.asarray(costos, dtype=np.float64)
+    if costos.ndim != 2 or costos.size == 0:
+        return []
+    filas, columnas = costos.shape
+    if filas > columnas:
+        # El algoritmo necesita filas <= columnas: se resuelve la transpuesta
+        return [(f, c) for c, f in asignar_minimo_costo(costos.T)]
+
+    # Índices desde 1; la columna 0 es ficticia (raíz del camino de aumento)
+    u = np.zeros(filas + 1)
+    v = np.zeros(columnas + 1)
+    fila_de = np.zeros(columnas + 1, dtype=np.int64)  # columna -> fila asignada (0 = libre)
+    previa = np.zeros(columnas + 1, dtype=np.int64)  # columna -> columna anterior en el camino
+
+    for fila in range(1, filas + 1):
+        fila_de[0] = fila
+        actual = 0
+        minimo = np.full(columnas + 1, np.inf)
+        usada = np.zeros(columnas + 1, dtype=bool)
+        while True:
+            usada[actual] = True
+            origen = fila_de[actual]
+            reducido = costos[origen - 1] - u[origen] - v[1:]
+            libres = ~usada[1:]
+            mejora = libres & (reducido < minimo[1:])
+            minimo[1:][mejora] = reducido[mejora]
+            previa[1:][mejora] = actual
+            candidatos = np.where(libres, minimo[1:], np.inf)
+            siguiente = int(np.argmin(candidatos)) + 1
+            delta = candidatos[siguiente - 1]
+            # Ajuste de potenciales: las columnas del árbol bajan, el resto acerca su mínimo
+            u[fila_de[usada]] += delta
+            v[usada] -= delta
+            minimo[~usada] -= delta
+            actual = siguiente
+            if fila_de[actual] == 0:
+                break
+        # Invertir el camino de aumento
+        while actual:
+            anterior = previa[actual]
+            fila_de[actual] = fila_de[anterior]
+            actual = anterior
+
+    return [(int(fila_de[c]) - 1, c - 1) for c in range(1, columnas + 1) if fila_de[c]]
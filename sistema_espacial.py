@@ -0,0 +1,300 @@
+"""
+sistema_espacial.py - Índices espaciales para entidades del mapa
+Game of Thrones: Simulador Político
+
+Permite consultar qué entidades caen dentro de un rectángulo (viewport)
+o de un radio sin recorrer toda la población:
+- GrillaEspacial: hash espacial por celdas, ideal para entidades que se mueven
+- QuadTree: árbol de cuadrantes que se adapta a la densidad de la población
+"""
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class GrillaEspacial:
+    """
+    Hash espacial de celdas cuadradas.
+
+    Cada entidad se guarda con una clave única (p. ej. el id del NPC) en la
+    celda que contiene su posición. Mover una entidad dentro de su misma
+    celda es O(1) y no toca los diccionarios.
+    """
+
+    def __init__(self, tam_celda: float = 128.0):
+        self.tam_celda = float(tam_celda)
+        self.celdas: Dict[Tuple[int, int], Dict[Hashable, Any]] = {}
+        self.celda_de: Dict[Hashable, Tuple[int, int]] = {}
+
+    def _celda(self, x: float, y: float) -> Tuple[int, int]:
+        """Celda que contiene el punto (x, y)"""
+        return int(x // self.tam_celda), int(y // self.tam_celda)
+
+    def insertar(self, clave: Hashable, x: float, y: float, obj: Any):
+        """Inserta (o reubica) una entidad en la grilla"""
+        if clave in self.celda_de:
+            self.remover(clave)
+        celda = self._celda(x, y)
+        self.celdas.setdefault(celda, {})[clave] = obj
+        self.celda_de[clave] = celda
+
+    def mover(self, clave: Hashable, x: float, y: float, obj: Any):
+        """Actualiza la posición de una entidad; solo cambia de celda si la cruzó"""
+        celda = self._celda(x, y)
+        anterior = self.celda_de.get(clave)
+        if anterior == celda:
+            return
+        if anterior is not None:
+            bucket = self.celdas[anterior]
+            bucket.pop(clave, None)
+            if not bucket:
+                del self.celdas[anterior]
+        self.celdas.setdefault(celda, {})[clave] = obj
+        self.celda_de[clave] = celda
+
+    def remover(self, clave: Hashable) -> bool:
+        """Quita una entidad de la grilla"""
+        celda = self.celda_de.pop(clave, None)
+        if celda is None:
+            return False
+        bucket = self.celdas.get(celda)
+        if bucket is not None:
+            bucket.pop(clave, None)
+            if not bucket:
+                del self.celdas[celda]
+        return True
+
+    def limpiar(self):
+        """Vacía la grilla"""
+        self.celdas.clear()
+        self.celda_de.clear()
+
+    def consultar_rect(self, x_min: float, y_min: float,
+                       x_max: float, y_max: float) -> List[Any]:
+        """
+        Entidades cuya posición cae en el rectángulo [x_min, x_max] x [y_min, y_max].
+        Solo se visitan las celdas que tocan el rectángulo.
+        """
+        cx0, cy0 = self._celda(x_min, y_min)
+        cx1, cy1 = self._celda(x_max, y_max)
+        resultado = []
+        # Si el rectángulo abarca más celdas de las que existen, iterar las ocupadas
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.celdas):
+            for (cx, cy), bucket in self.celdas.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    self._filtrar_rect(bucket, x_min, y_min, x_max, y_max, resultado)
+            return resultado
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                bucket = self.celdas.get((cx, cy))
+                if bucket:
+                    self._filtrar_rect(bucket, x_min, y_min, x_max, y_max, resultado)
+        return resultado
+
+    @staticmethod
+    def _filtrar_rect(bucket: Dict[Hashable, Any], x_min: float, y_min: float,
+                      x_max: float, y_max: float, resultado: List[Any]):
+        for obj in bucket.values():
+            if x_min <= obj.x <= x_max and y_min <= obj.y <= y_max:
+                resultado.append(obj)
+
+    def consultar_radio(self, x: float, y: float, radio: float) -> List[Any]:
+        """Entidades a distancia <= radio del punto (x, y)"""
+        r2 = radio * radio
+        return [obj for obj in self.consultar_rect(x - radio, y - radio, x + radio, y + radio)
+                if (obj.x - x) ** 2 + (obj.y - y) ** 2 <= r2]
+
+    def __len__(self) -> int:
+        return len(self.celda_de)
+
+    def __contains__(self, clave: Hashable) -> bool:
+        return clave in self.celda_de
+
+
+class _NodoQuad:
+    """Nodo del QuadTree. Solo las hojas guardan puntos."""
+    __slots__ = ("x_min", "y_min", "x_max", "y_max", "puntos", "hijos", "padre")
+
+    def __init__(self, x_min: float, y_min: float, x_max: float, y_max: float,
+                 padre: Optional["_NodoQuad"] = None):
+        self.x_min = x_min
+        self.y_min = y_min
+        self.x_max = x_max
+        self.y_max = y_max
+        self.puntos: Dict[Hashable, Tuple[float, float, Any]] = {}
+        self.hijos: Optional[List["_NodoQuad"]] = None
+        self.padre = padre
+
+    def contiene(self, x: float, y: float) -> bool:
+        return self.x_min <= x <= self.x_max and self.y_min <= y <= self.y_max
+
+    def intersecta(self, x_min: float, y_min: float, x_max: float, y_max: float) -> bool:
+        return not (x_max < self.x_min or x_min > self.x_max or
+                    y_max < self.y_min or y_min > self.y_max)
+
+    def hijo_para(self, x: float, y: float) -> "_NodoQuad":
+        mx = (self.x_min + self.x_max) / 2
+        my = (self.y_min + self.y_max) / 2
+        return self.hijos[(2 if y >= my else 0) + (1 if x >= mx else 0)]
+
+
+class QuadTree:
+    """
+    QuadTree de puntos con actualización incremental.
+
+    - Las hojas se dividen al superar `capacidad` puntos (hasta `tam_min` de lado)
+    - Mover un punto dentro de su hoja es O(1); si sale, se reinserta en O(log n)
+    - Al remover, los hermanos casi vacíos se fusionan de nuevo en una hoja
+    - Si se inserta un punto fuera de los límites, la raíz crece hacia él
+    """
+
+    def __init__(self, x_min: float, y_min: float, x_max: float, y_max: float,
+                 capacidad: int = 16, tam_min: float = 8.0):
+        self.raiz = _NodoQuad(float(x_min), float(y_min),
+                              float(max(x_max, x_min + 1)), float(max(y_max, y_min + 1)))
+        self.capacidad = capacidad
+        self.tam_min = tam_min
+        self.nodo_de: Dict[Hashable, _NodoQuad] = {}
+
+    # ========== MANTENIMIENTO ==========
+
+    def _crecer_hacia(self, x: float, y: float):
+        """Duplica la raíz hacia el punto hasta que quede dentro"""
+        while not self.raiz.contiene(x, y):
+            vieja = self.raiz
+            ancho = vieja.x_max - vieja.x_min
+            alto = vieja.y_max - vieja.y_min
+            if vieja.hijos is None:
+                # Una hoja puede simplemente ampliar sus límites
+                if x < vieja.x_min:
+                    vieja.x_min -= ancho
+                elif x > vieja.x_max:
+                    vieja.x_max += ancho
+                if y < vieja.y_min:
+                    vieja.y_min -= alto
+                elif y > vieja.y_max:
+                    vieja.y_max += alto
+                continue
+            x_min = vieja.x_min - ancho if x < vieja.x_min else vieja.x_min
+            y_min = vieja.y_min - alto if y < vieja.y_min else vieja.y_min
+            nueva = _NodoQuad(x_min, y_min, x_min + 2 * ancho, y_min + 2 * alto)
+            nueva.hijos = []
+            for iy in range(2):
+                for ix in range(2):
+                    cx = x_min + ix * ancho
+                    cy = y_min + iy * alto
+                    if cx == vieja.x_min and cy == vieja.y_min:
+                        vieja.padre = nueva
+                        nueva.hijos.append(vieja)
+                    else:
+                        nueva.hijos.append(_NodoQuad(cx, cy, cx + ancho, cy + alto, nueva))
+            self.raiz = nueva
+
+    def _dividir(self, hoja: _NodoQuad):
+        """Divide una hoja llena en cuatro cuadrantes"""
+        mx = (hoja.x_min + hoja.x_max) / 2
+        my = (hoja.y_min + hoja.y_max) / 2
+        hoja.hijos = [
+            _NodoQuad(hoja.x_min, hoja.y_min, mx, my, hoja),
+            _NodoQuad(mx, hoja.y_min, hoja.x_max, my, hoja),
+            _NodoQuad(hoja.x_min, my, mx, hoja.y_max, hoja),
+            _NodoQuad(mx, my, hoja.x_max, hoja.y_max, hoja),
+        ]
+        puntos, hoja.puntos = hoja.puntos, {}
+        for clave, punto in puntos.items():
+            hijo = hoja.hijo_para(punto[0], punto[1])
+            hijo.puntos[clave] = punto
+            self.nodo_de[clave] = hijo
+
+    def _fusionar(self, nodo: Optional[_NodoQuad]):
+        """Vuelve a convertir en hoja los nodos cuyos hijos quedaron casi vacíos"""
+        while nodo is not None and nodo.hijos is not None:
+            if any(h.hijos is not None for h in nodo.hijos):
+                return
+            total = sum(len(h.puntos) for h in nodo.hijos)
+            if total > self.capacidad // 2:
+                return
+            for hijo in nodo.hijos:
+                for clave, punto in hijo.puntos.items():
+                    nodo.puntos[clave] = punto
+                    self.nodo_de[clave] = nodo
+            nodo.hijos = None
+            nodo = nodo.padre
+
+    # ========== OPERACIONES PÚBLICAS ==========
+
+    def insertar(self, clave: Hashable, x: float, y: float, obj: Any):
+        """Inserta (o reubica) un punto"""
+        if clave in self.nodo_de:
+            self.remover(clave)
+        if not self.raiz.contiene(x, y):
+            self._crecer_hacia(x, y)
+        nodo = self.raiz
+        while nodo.hijos is not None:
+            nodo = nodo.hijo_para(x, y)
+        nodo.puntos[clave] = (x, y, obj)
+        self.nodo_de[clave] = nodo
+        if (len(nodo.puntos) > self.capacidad and
+                nodo.x_max - nodo.x_min > self.tam_min and nodo.y_max - nodo.y_min > self.tam_min):
+            self._dividir(nodo)
+
+    def mover(self, clave: Hashable, x: float, y: float, obj: Any):
+        """Actualiza la posición de un punto; solo reestructura si sale de su hoja"""
+        hoja = self.nodo_de.get(clave)
+        if hoja is not None and hoja.contiene(x, y):
+            hoja.puntos[clave] = (x, y, obj)
+            return
+        self.insertar(clave, x, y, obj)
+
+    def remover(self, clave: Hashable) -> bool:
+        """Quita un punto del árbol"""
+        hoja = self.nodo_de.pop(clave, None)
+        if hoja is None:
+            return False
+        hoja.puntos.pop(clave, None)
+        self._fusionar(hoja.padre)
+        return True
+
+    def limpiar(self):
+        """Vacía el árbol conservando sus límites"""
+        r = self.raiz
+        self.raiz = _NodoQuad(r.x_min, r.y_min, r.x_max, r.y_max)
+        self.nodo_de.clear()
+
+    def consultar_rect(self, x_min: float, y_min: float,
+                       x_max: float, y_max: float) -> List[Any]:
+        """Objetos cuya posición cae en el rectángulo [x_min, x_max] x [y_min, y_max]"""
+        resultado = []
+        pila = [self.raiz]
+        while pila:
+            nodo = pila.pop()
+            if not nodo.intersecta(x_min, y_min, x_max, y_max):
+                continue
+            if nodo.hijos is not None:
+                pila.extend(nodo.hijos)
+                continue
+            for x, y, obj in nodo.puntos.values():
+                if x_min <= x <= x_max and y_min <= y <= y_max:
+                    resultado.append(obj)
+        return resultado
+
+    def consultar_radio(self, x: float, y: float, radio: float) -> List[Any]:
+        """Objetos a distancia <= radio del punto (x, y)"""
+        r2 = radio * radio
+        resultado = []
+        pila = [self.raiz]
+        while pila:
+            nodo = pila.pop()
+            if not nodo.intersecta(x - radio, y - radio, x + radio, y + radio):
+                continue
+            if nodo.hijos is not None:
+                pila.extend(nodo.hijos)
+                continue
+            for px, py, obj in nodo.puntos.values():
+                if (px - x) ** 2 + (py - y) ** 2 <= r2:
+                    resultado.append(obj)
+        return resultado
+
+    def __len__(self) -> int:
+        return len(self.nodo_de)
+
+    def __contains__(self, clave: Hashable) -> bool:
+        return clave in self.nodo_de
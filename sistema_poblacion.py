@@ -0,0 +1,549 @@
+"""
+sistema_poblacion.py - Almacén columnar (structure of arrays) de NPCs
+Game of Thrones: Simulador Político
+
+Los datos "calientes" de cada NPC (posición, objetivo, velocidad, stamina,
+estado, progreso de tarea, reino) viven en arrays de numpy, una fila por NPC.
+El objeto NPC sigue existiendo para la lógica de alto nivel, pero sus atributos
+calientes son vistas sobre su fila (ver ColumnaNPC). La fila es el id del NPC.
+
+Así el paso de movimiento de todos los NPCs (cada frame) y la demografía
+(cada semana) se hacen con un puñado de operaciones vectorizadas en vez de una
+llamada Python por NPC.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+
+
+# Códigos de estado (columna `estado`)
+IDLE, MOVING, WORKING = 0, 1, 2
+ESTADOS = ("idle", "moving", "working")
+CODIGO_ESTADO = {nombre: codigo for codigo, nombre in enumerate(ESTADOS)}
+
+# Parámetros del paso de movimiento y trabajo de cada frame
+DISTANCIA_LLEGADA = 5.0
+PROB_DEAMBULAR = 0.01
+MAX_FALLOS_MOVIMIENTO = 5
+INTENTOS_PUNTO_ALEATORIO = 16
+MAX_REINOS = 64
+EDAD_ADULTA = 14  # desde aquí un NPC cuenta como ocioso o como militar en los agregados
+
+# Códigos de género y estado civil (mismo orden que los Enum Genero y EstadoCivil)
+MASCULINO, FEMENINO = 0, 1
+SOLTERO, CASADO, VIUDO = 0, 1, 2
+
+# Parámetros de la semana demográfica
+PROB_ENVEJECER = 0.05
+EDAD_VEJEZ = 70
+PROB_MUERTE_VEJEZ = 0.02
+PROB_CURAR_PIE = 0.3
+PROB_CURAR_ENFERMEDAD = 0.4
+PROB_ENFERMAR = 0.05
+PROB_CONCEBIR = 0.20
+MESES_GESTACION = 9
+
+
+class ColumnaNPC:
+    """Descriptor: expone una columna del almacén como atributo del NPC"""
+
+    def __init__(self, columna: str):
+        self.columna = columna
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return getattr(obj.poblacion, self.columna).item(obj.id)
+
+    def __set__(self, obj, valor):
+        getattr(obj.poblacion, self.columna)[obj.id] = valor
+
+
+class EstadoNPC(ColumnaNPC):
+    """Descriptor del estado: se guarda como código y se expone como texto"""
+
+    def __init__(self):
+        super().__init__("estado")
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return ESTADOS[obj.poblacion.estado.item(obj.id)]
+
+    def __set__(self, obj, valor: str):
+        obj.poblacion.estado[obj.id] = CODIGO_ESTADO[valor]
+
+
+class ColumnaContadaNPC(ColumnaNPC):
+    """Descriptor de una columna que entra en los agregados por reino: los mantiene al escribir"""
+
+    def __set__(self, obj, valor):
+        poblacion = obj.poblacion
+        poblacion._contar(obj.id, -1)
+        getattr(poblacion, self.columna)[obj.id] = valor
+        poblacion._contar(obj.id, +1)
+
+
+class EnumColumnaNPC(ColumnaNPC):
+    """Descriptor de un Enum guardado como su posición dentro del Enum"""
+
+    def __init__(self, columna: str, enum_cls):
+        super().__init__(columna)
+        self.valores = tuple(enum_cls)
+        self.codigos = {valor: codigo for codigo, valor in enumerate(self.valores)}
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        return self.valores[getattr(obj.poblacion, self.columna).item(obj.id)]
+
+    def __set__(self, obj, valor):
+        getattr(obj.poblacion, self.columna)[obj.id] = self.codigos[valor]
+
+
+class IdOpcionalNPC(ColumnaNPC):
+    """Descriptor de un id de NPC opcional (-1 en la columna = None)"""
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        valor = getattr(obj.poblacion, self.columna).item(obj.id)
+        return None if valor < 0 else valor
+
+    def __set__(self, obj, valor: Optional[int]):
+        getattr(obj.poblacion, self.columna)[obj.id] = -1 if valor is None else valor
+
+
+class PoblacionColumnar:
+    """
+    Almacén columnar de NPCs con paso de simulación vectorizado.
+
+    Cada NPC ocupa una fila fija desde que se registra; al morir la fila se
+    marca inactiva y deja de participar en el paso.
+    """
+
+    COLUMNAS = {
+        "x": np.float64,
+        "y": np.float64,
+        "target_x": np.float64,
+        "target_y": np.float64,
+        "velocidad": np.float64,
+        "stamina": np.float64,
+        "estado": np.int8,
+        "progreso": np.float64,
+        "reino": np.int16,
+        "duracion_tarea": np.float64,  # semanas; 0 si no tiene tarea
+        "tiene_tarea": np.bool_,
+        "ruta_tarea": np.bool_,        # el movimiento actual va hacia una tarea
+        "fallos": np.int16,
+        "activo": np.bool_,
+        "celda": np.int64,             # última celda de grilla conocida (ver cambios_de_celda)
+        "militar": np.bool_,           # tiene la profesión militar (para el poder del reino)
+        # Demografía (ver avanzar_semana)
+        "edad": np.int16,
+        "genero": np.int8,
+        "estado_civil": np.int8,
+        "pareja": np.int64,            # id de la pareja; -1 si no tiene
+        "hambre": np.float64,
+        "estado_animo": np.float64,
+        "dinero": np.int64,
+        "trabajos_completados": np.int32,
+        "semanas_trabajadas": np.int32,
+        # Salud (ver Lesion en main.py)
+        "pie_roto": np.bool_,
+        "brazo_roto": np.bool_,
+        "enfermedad": np.bool_,
+        "herida_grave": np.bool_,
+        "embarazada": np.bool_,
+        "meses_embarazo": np.float64,
+    }
+
+    def __init__(self, capacidad: int = 1024, semilla: Optional[int] = None):
+        self.capacidad = max(1, capacidad)
+        self.n = 0
+        for nombre, dtype in self.COLUMNAS.items():
+            setattr(self, nombre, np.zeros(self.capacidad, dtype=dtype))
+        self.npcs: List[Optional[Any]] = []
+        self.rng = np.random.default_rng(semilla)
+
+        # Mapas de validación (se configuran con configurar_mapa)
+        self.tierra: Optional[np.ndarray] = None         # [y - pad, x - pad] -> no es agua
+        self.mascara_reinos: Optional[np.ndarray] = None  # [y, x] -> bit (1 << id) de cada reino que lo contiene
+        self.pad = 0
+        self.bbox_reinos = np.zeros((MAX_REINOS, 4), dtype=np.int64)  # x, y, ancho, alto
+        self.tiene_bbox = np.zeros(MAX_REINOS, dtype=np.bool_)
+        self.reino_activo = np.ones(MAX_REINOS, dtype=np.bool_)
+
+        # Agregados por reino, mantenidos en cada transición (lectura O(1))
+        self.con_tarea_reino = np.zeros(MAX_REINOS, dtype=np.int64)
+        self.ociosos_reino = np.zeros(MAX_REINOS, dtype=np.int64)   # adultos sin tarea
+        self.militares_reino = np.zeros(MAX_REINOS, dtype=np.int64)  # adultos militares
+        self.adultos_nuevos = np.empty(0, dtype=np.int64)  # filas que cumplieron EDAD_ADULTA en la última semana
+
+    # ========== REGISTRO ==========
+
+    def _crecer(self):
+        nueva = self.capacidad * 2
+        for nombre in self.COLUMNAS:
+            viejo = getattr(self, nombre)
+            arr = np.zeros(nueva, dtype=viejo.dtype)
+            arr[:self.capacidad] = viejo
+            setattr(self, nombre, arr)
+        self.capacidad = nueva
+
+    def registrar(self, npc: Any) -> int:
+        """Reserva una fila para el NPC y la retorna"""
+        if self.n >= self.capacidad:
+            self._crecer()
+        fila = self.n
+        self.n += 1
+        self.npcs.append(npc)
+        self.activo[fila] = True
+        self.celda[fila] = -1
+        self.pareja[fila] = -1
+        return fila
+
+    def liberar(self, fila: int):
+        """Marca la fila como inactiva (NPC muerto o retirado)"""
+        if 0 <= fila < self.n:
+            self._contar(fila, -1)
+            self.activo[fila] = False
+            self.tiene_tarea[fila] = False
+            self.npcs[fila] = None
+
+    def fijar_tarea(self, fila: int, duracion_semanas: float):
+        """Sincroniza las columnas de tarea (duración 0 = sin tarea)"""
+        self._contar(fila, -1)
+        self.tiene_tarea[fila] = duracion_semanas > 0
+        self.duracion_tarea[fila] = duracion_semanas
+        self._contar(fila, +1)
+
+    # ========== AGREGADOS POR REINO ==========
+
+    def _contar(self, fila: int, signo: int):
+        """Suma (signo=+1) o resta (-1) el aporte de una fila a los agregados de su reino"""
+        if not self.activo[fila]:
+            return
+        reino = self.reino[fila]
+        adulto = self.edad[fila] >= EDAD_ADULTA
+        if self.tiene_tarea[fila]:
+            self.con_tarea_reino[reino] += signo
+        elif adulto:
+            self.ociosos_reino[reino] += signo
+        if adulto and self.militar[fila]:
+            self.militares_reino[reino] += signo
+
+    def _contar_filas(self, filas: np.ndarray, signo: int):
+        """Versión en bloque de _contar"""
+        filas = filas[self.activo[filas]]
+        if filas.size == 0:
+            return
+        reino = self.reino[filas]
+        adulto = self.edad[filas] >= EDAD_ADULTA
+        tarea = self.tiene_tarea[filas]
+        np.add.at(self.con_tarea_reino, reino, signo * tarea)
+        np.add.at(self.ociosos_reino, reino, signo * (adulto & ~tarea))
+        np.add.at(self.militares_reino, reino, signo * (adulto & self.militar[filas]))
+
+    def agregados_escaneados(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Los mismos agregados recalculados con un recorrido completo (para verificación)"""
+        n = self.n
+        activo = self.activo[:n]
+        reino = self.reino[:n]
+        adulto = self.edad[:n] >= EDAD_ADULTA
+        tarea = self.tiene_tarea[:n]
+
+        def contar(mascara):
+            return np.bincount(reino[mascara], minlength=MAX_REINOS)[:MAX_REINOS]
+
+        return (contar(activo & tarea), contar(activo & adulto & ~tarea),
+                contar(activo & adulto & self.militar[:n]))
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.activo[:self.n]))
+
+    def sembrar(self, semilla: Optional[int]):
+        """Reinicia el generador aleatorio del almacén (para partidas reproducibles)"""
+        self.rng = np.random.default_rng(semilla)
+
+    # ========== MAPAS ==========
+
+    def configurar_mapa(self, tiles_map, pad: int, map_w: int, map_h: int,
+                        poligonos: Dict[int, List[List[float]]], ancho_mundo: int, alto_mundo: int):
+        """Precalcula la máscara de tierra y la máscara de reinos (rasterizando polígonos)"""
+        self.pad = pad
+        if tiles_map is not None:
+            self.tierra = np.array([[t != "water" for t in fila[:map_w]] for fila in tiles_map[:map_h]],
+                                   dtype=np.bool_)
+        # Un bit por reino (los polígonos pueden solaparse en los bordes), en el entero más chico que alcance
+        tipo = np.min_scalar_type(1 << max(poligonos, default=0))
+        self.mascara_reinos = np.zeros((alto_mundo, ancho_mundo), dtype=tipo)
+        for reino_id, poly in poligonos.items():
+            if len(poly) < 3:
+                continue
+            self._rasterizar(reino_id, poly)
+
+    def _rasterizar(self, reino_id: int, poly: List[List[float]]):
+        """Rellena la máscara con el polígono usando la misma regla par-impar que point_in_polygon"""
+        alto, ancho = self.mascara_reinos.shape
+        pts = np.asarray(poly, dtype=np.float64)
+        p1 = pts
+        p2 = np.roll(pts, -1, axis=0)
+        y_lo = np.minimum(p1[:, 1], p2[:, 1])
+        y_hi = np.maximum(p1[:, 1], p2[:, 1])
+        x0, y0 = int(max(0, np.floor(pts[:, 0].min()))), int(max(0, np.floor(pts[:, 1].min())))
+        x1, y1 = int(min(ancho - 1, np.ceil(pts[:, 0].max()))), int(min(alto - 1, np.ceil(pts[:, 1].max())))
+        if x1 < x0 or y1 < y0:
+            return
+        xs = np.arange(x0, x1 + 1, dtype=np.float64)
+        horizontal = p1[:, 1] == p2[:, 1]
+        for y in range(y0, y1 + 1):
+            cruza = (y > y_lo) & (y <= y_hi)
+            if not cruza.any():
+                continue
+            a, b = p1[cruza], p2[cruza]
+            # Aristas verticales se evalúan con su x; el resto con la intersección
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cortes = np.where(horizontal[cruza], np.inf,
+                                  (y - a[:, 1]) * (b[:, 0] - a[:, 0]) / (b[:, 1] - a[:, 1]) + a[:, 0])
+            cortes.sort()
+            # Dentro si hay un número impar de cortes a la derecha (x <= corte)
+            derecha = cortes.size - np.searchsorted(cortes, xs, side="left")
+            fila = self.mascara_reinos[y, x0:x1 + 1]
+            fila[(derecha & 1) == 1] |= fila.dtype.type(1 << reino_id)
+        ancho_bbox = x1 - x0 + 1
+        alto_bbox = y1 - y0 + 1
+        self.bbox_reinos[reino_id] = (x0, y0, ancho_bbox, alto_bbox)
+        self.tiene_bbox[reino_id] = True
+
+    def posiciones_validas(self, xs: np.ndarray, ys: np.ndarray, reinos: np.ndarray) -> np.ndarray:
+        """Máscara de posiciones en tierra y dentro del propio reino"""
+        validas = np.ones(xs.shape, dtype=np.bool_)
+        if self.tierra is not None:
+            tx = (xs - self.pad).astype(np.int64)
+            ty = (ys - self.pad).astype(np.int64)
+            alto, ancho = self.tierra.shape
+            dentro = (tx >= 0) & (ty >= 0) & (tx < ancho) & (ty < alto)
+            validas &= dentro
+            validas[dentro] &= self.tierra[ty[dentro], tx[dentro]]
+        if self.mascara_reinos is not None:
+            mx = xs.astype(np.int64)
+            my = ys.astype(np.int64)
+            alto, ancho = self.mascara_reinos.shape
+            dentro = (mx >= 0) & (my >= 0) & (mx < ancho) & (my < alto)
+            con_poligono = self.tiene_bbox[reinos]
+            ok = ~con_poligono
+            idx = dentro & con_poligono
+            bits = self.mascara_reinos[my[idx], mx[idx]] >> reinos[idx].astype(self.mascara_reinos.dtype)
+            ok[idx] = (bits & 1) == 1
+            validas &= ok
+        return validas
+
+    def puntos_aleatorios(self, filas: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Un punto válido al azar dentro del reino de cada fila.
+        Si no se encuentra en los intentos disponibles, retorna la posición actual.
+        """
+        px = self.x[filas].copy()
+        py = self.y[filas].copy()
+        reinos = self.reino[filas]
+        pendientes = np.nonzero(self.tiene_bbox[reinos])[0]
+        for _ in range(INTENTOS_PUNTO_ALEATORIO):
+            if pendientes.size == 0:
+                break
+            bbox = self.bbox_reinos[reinos[pendientes]]
+            cx = bbox[:, 0] + np.floor(self.rng.random(pendientes.size) * bbox[:, 2])
+            cy = bbox[:, 1] + np.floor(self.rng.random(pendientes.size) * bbox[:, 3])
+            ok = self.posiciones_validas(cx, cy, reinos[pendientes])
+            elegidos = pendientes[ok]
+            px[elegidos] = cx[ok]
+            py[elegidos] = cy[ok]
+            pendientes = pendientes[~ok]
+        return px, py
+
+    def punto_en_reino(self, reino_id: int) -> Optional[Tuple[int, int]]:
+        """Un punto en tierra dentro del reino (un lote de candidatos por intento), o None"""
+        if reino_id >= self.tiene_bbox.size or not self.tiene_bbox[reino_id]:
+            return None
+        x0, y0, ancho, alto = self.bbox_reinos[reino_id]
+        reinos = np.full(INTENTOS_PUNTO_ALEATORIO, reino_id, dtype=np.int64)
+        for _ in range(INTENTOS_PUNTO_ALEATORIO):
+            cx = x0 + np.floor(self.rng.random(reinos.size) * ancho)
+            cy = y0 + np.floor(self.rng.random(reinos.size) * alto)
+            ok = np.flatnonzero(self.posiciones_validas(cx, cy, reinos))
+            if ok.size:
+                return int(cx[ok[0]]), int(cy[ok[0]])
+        return None
+
+    # ========== PASO VECTORIZADO ==========
+
+    def tick(self, dt: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Avanza un frame a todos los NPCs activos.
+        Retorna (filas_que_completaron_tarea, filas_que_fallaron_su_tarea).
+        """
+        n = self.n
+        vacio = np.empty(0, dtype=np.int64)
+        if n == 0:
+            return vacio, vacio
+        reino = self.reino[:n]
+        activos = self.activo[:n] & self.reino_activo[reino]
+        estado = self.estado[:n]
+        # Las máscaras se toman al inicio: cada NPC ejecuta una sola rama por frame
+        idle = np.nonzero(activos & (estado == IDLE))[0]
+        moving = np.nonzero(activos & (estado == MOVING))[0]
+        working = np.nonzero(activos & (estado == WORKING))[0]
+
+        # ----- IDLE: descansar y, a veces, deambular -----
+        if idle.size:
+            self.stamina[idle] = np.minimum(100.0, self.stamina[idle] + 0.1)
+            deambula = idle[(self.rng.random(idle.size) < PROB_DEAMBULAR) & self.tiene_bbox[self.reino[idle]]]
+            if deambula.size:
+                self.target_x[deambula], self.target_y[deambula] = self.puntos_aleatorios(deambula)
+                self.estado[deambula] = MOVING
+                self.ruta_tarea[deambula] = False
+
+        # ----- MOVING: avanzar hacia el objetivo validando terreno y reino -----
+        fallidas = vacio
+        if moving.size:
+            dx = self.target_x[moving] - self.x[moving]
+            dy = self.target_y[moving] - self.y[moving]
+            dist = np.hypot(dx, dy)
+            llego = dist < DISTANCIA_LLEGADA
+            llegaron = moving[llego]
+            self.estado[llegaron] = np.where(self.tiene_tarea[llegaron], WORKING, IDLE)
+
+            sigue = ~llego
+            filas = moving[sigue]
+            paso = self.velocidad[filas] / dist[sigue]
+            nx = self.x[filas] + dx[sigue] * paso
+            ny = self.y[filas] + dy[sigue] * paso
+            ok = self.posiciones_validas(nx, ny, self.reino[filas])
+            self.x[filas[ok]] = nx[ok]
+            self.y[filas[ok]] = ny[ok]
+
+            bloqueadas = filas[~ok]
+            if bloqueadas.size:
+                self.fallos[bloqueadas] += 1
+                agotadas = bloqueadas[self.fallos[bloqueadas] >= MAX_FALLOS_MOVIMIENTO]
+                reintentan = bloqueadas[self.fallos[bloqueadas] < MAX_FALLOS_MOVIMIENTO]
+                if agotadas.size:
+                    # Reaparecer en un punto válido del reino; si tenía tarea, la pierde
+                    px, py = self.puntos_aleatorios(agotadas)
+                    self.x[agotadas] = self.target_x[agotadas] = px
+                    self.y[agotadas] = self.target_y[agotadas] = py
+                    self.estado[agotadas] = IDLE
+                    self.fallos[agotadas] = 0
+                    fallidas = agotadas[self.tiene_tarea[agotadas]]
+                    self._contar_filas(fallidas, -1)
+                    self.tiene_tarea[fallidas] = False
+                    self.duracion_tarea[fallidas] = 0.0
+                    self._contar_filas(fallidas, +1)
+                    self.progreso[fallidas] = 0.0
+                if reintentan.size:
+                    tx, ty = self.puntos_aleatorios(reintentan)
+                    self.target_x[reintentan] = tx
+                    self.target_y[reintentan] = ty
+                    cerca = np.hypot(tx - self.x[reintentan], ty - self.y[reintentan]) < DISTANCIA_LLEGADA
+                    self.estado[reintentan[cerca]] = IDLE
+                    self.fallos[reintentan[cerca]] = 0
+
+        # ----- WORKING: avanzar el progreso de la tarea -----
+        completadas = vacio
+        if working.size:
+            con_tarea = self.tiene_tarea[working]
+            self.estado[working[~con_tarea]] = IDLE
+            trabajan = working[con_tarea]
+            if trabajan.size:
+                # Una tarea de d semanas dura d * 0.7 segundos de juego
+                self.progreso[trabajan] += dt / (self.duracion_tarea[trabajan] * 7 * 0.1)
+                self.stamina[trabajan] = np.maximum(0.0, self.stamina[trabajan] - 0.05)
+                completadas = trabajan[self.progreso[trabajan] >= 1.0]
+
+        return completadas, fallidas
+
+    def cambios_de_celda(self, tam_celda: float) -> np.ndarray:
+        """Filas activas cuya celda de grilla cambió desde la última llamada"""
+        n = self.n
+        cx = np.floor(self.x[:n] / tam_celda).astype(np.int64)
+        cy = np.floor(self.y[:n] / tam_celda).astype(np.int64)
+        clave = (cx << 32) ^ (cy & 0xFFFFFFFF)
+        cambiadas = np.nonzero(self.activo[:n] & (clave != self.celda[:n]))[0]
+        self.celda[cambiadas] = clave[cambiadas]
+        return cambiadas
+
+    # ========== PASO DEMOGRÁFICO SEMANAL ==========
+
+    def avanzar_semana(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Semana demográfica de todos los NPCs activos (la única implementación de la semana de un NPC):
+        embarazos, envejecimiento, hambre, enfermedades, concepción y cobro de trabajos.
+        Retorna (filas que dan a luz, filas que fallecen de viejas); el parto y los
+        eventos los resuelve quien llama, solo para esas filas.
+        """
+        n = self.n
+        vacio = self.adultos_nuevos = np.empty(0, dtype=np.int64)
+        if n == 0:
+            return vacio, vacio
+        rng = self.rng
+        vivos = self.activo[:n]
+        edad = self.edad[:n]
+        embarazada = self.embarazada[:n]
+        meses = self.meses_embarazo[:n]
+        self.semanas_trabajadas[:n][vivos] += 1
+
+        # Las que dan a luz no hacen nada más esta semana
+        gestando = vivos & embarazada
+        meses[gestando] += 0.25
+        parto = gestando & (meses >= MESES_GESTACION)
+        sigue = vivos & ~parto
+
+        cumple = sigue & (rng.random(n) < PROB_ENVEJECER)
+        # Quienes llegan a adultos cambian los agregados de su reino
+        adultos_nuevos = self.adultos_nuevos = np.flatnonzero(cumple & (edad == EDAD_ADULTA - 1))
+        self._contar_filas(adultos_nuevos, -1)
+        edad[cumple] += 1
+        self._contar_filas(adultos_nuevos, +1)
+        # El aviso de muerte por vejez también corta la semana del NPC
+        muere = sigue & (edad > EDAD_VEJEZ) & (rng.random(n) < PROB_MUERTE_VEJEZ)
+        sigue &= ~muere
+
+        self.hambre[:n] = np.where(sigue, np.maximum(0.0, self.hambre[:n] - rng.uniform(0.05, 0.15, n)),
+                                   self.hambre[:n])
+        self.stamina[:n] = np.where(sigue, np.minimum(100.0, self.stamina[:n] + 2), self.stamina[:n])
+
+        self.pie_roto[:n] &= ~(sigue & (rng.random(n) < PROB_CURAR_PIE))
+        self.enfermedad[:n] &= ~(sigue & (rng.random(n) < PROB_CURAR_ENFERMEDAD))
+        enferma = sigue & (rng.random(n) < PROB_ENFERMAR)
+        self.enfermedad[:n] |= enferma
+        self.estado_animo[:n] -= 0.2 * enferma
+
+        # Concepción: ella y su pareja (viva) tienen que poder reproducirse
+        mujer = self.genero[:n] == FEMENINO
+        casado = self.estado_civil[:n] == CASADO
+        fertil = casado & (edad >= 18) & np.where(mujer, (edad < 45) & ~embarazada, edad < 70)
+        pareja = self.pareja[:n]
+        con_pareja = np.flatnonzero(sigue & mujer & fertil & (pareja >= 0))
+        if con_pareja.size:
+            otra = pareja[con_pareja]
+            concibe = con_pareja[self.activo[otra] & fertil[otra] & (rng.random(con_pareja.size) < PROB_CONCEBIR)]
+            embarazada[concibe] = True
+            meses[concibe] = 0.0
+
+        trabajos = self.trabajos_completados[:n]
+        cobra = np.flatnonzero(sigue & (trabajos > 0))
+        if cobra.size:
+            self.dinero[cobra] += trabajos[cobra] * rng.integers(5, 16, cobra.size)
+        trabajos[sigue] = 0
+
+        return np.flatnonzero(parto), np.flatnonzero(muere)
+
+    def filas_con_edad(self, edad_minima: int) -> np.ndarray:
+        """Filas activas con al menos `edad_minima` años"""
+        n = self.n
+        return np.flatnonzero(self.activo[:n] & (self.edad[:n] >= edad_minima))
+
+    def solteros_buscando(self, prob: float) -> np.ndarray:
+        """Filas de adultos solteros que esta semana salen a buscar pareja (con probabilidad `prob`)"""
+        n = self.n
+        return np.flatnonzero(self.activo[:n] & (self.estado_civil[:n] == SOLTERO) &
+                              (self.edad[:n] >= 18) & (self.rng.random(n) < prob))
@@ -10,8 +10,10 @@ Sistema realista de producción de alimentos:
 """
 import random
 from dataclasses import dataclass
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from enum import Enum
+from config_got import ANCHO, ALTO
+from sistema_espacial import QuadTree
 
 
 class TipoCultivo(Enum):
@@ -34,7 +36,7 @@ class TipoTerreno(Enum):
     AGUA = "agua"
 
 
-@dataclass
+@dataclass(slots=True)
 class Campo:
     """Un campo de cultivo"""
     x: float
@@ -83,7 +85,7 @@ class Campo:
         self.cosechado = False
 
 
-@dataclass
+@dataclass(slots=True)
 class Rebano:
     """Un rebaño de animales domésticos"""
     x: float
@@ -115,6 +117,31 @@ class GestorAgricultura:
         self.campos: List[Campo] = []
         self.rebanos: List[Rebano] = []
         self.mapa_terreno: dict = {}  # Cache de tipo de terreno por posición
+        
+        # 🚀 OPTIMIZACIÓN: Índices espaciales (campos y rebaños casi no se mueven)
+        self.indice_campos = QuadTree(0, 0, 1, 1)
+        self.indice_rebanos = QuadTree(0, 0, 1, 1)
+        self.campos_por_casa: Dict[str, QuadTree] = {}  # casa -> QuadTree de sus campos
+        self._max_tam_campo = 0.0  # Mayor ancho/alto de un campo (margen de consulta)
+        self._siguiente_clave = 0
+    
+    def agregar_campo(self, campo: Campo):
+        """Agrega un campo a la lista y a los índices espaciales"""
+        clave = self._siguiente_clave
+        self._siguiente_clave += 1
+        self.campos.append(campo)
+        self.indice_campos.insertar(clave, campo.x, campo.y, campo)
+        if campo.casa not in self.campos_por_casa:
+            self.campos_por_casa[campo.casa] = QuadTree(campo.x - 1, campo.y - 1, campo.x + 1, campo.y + 1)
+        self.campos_por_casa[campo.casa].insertar(clave, campo.x, campo.y, campo)
+        self._max_tam_campo = max(self._max_tam_campo, campo.ancho, campo.alto)
+    
+    def agregar_rebano(self, rebano: Rebano):
+        """Agrega un rebaño a la lista y al índice espacial"""
+        clave = self._siguiente_clave
+        self._siguiente_clave += 1
+        self.rebanos.append(rebano)
+        self.indice_rebanos.insertar(clave, rebano.x, rebano.y, rebano)
     
     def determinar_tipo_terreno(self, x: float, y: float, mundo_ancho: int, mundo_alto: int) -> TipoTerreno:
         """Determina el tipo de terreno en una posición"""
@@ -174,6 +201,9 @@ class GestorAgricultura:
     
     def inicializar_campos(self, casas: dict, ubicaciones_castillos: dict, mundo_ancho: int, mundo_alto: int):
         """Crea campos de cultivo alrededor de cada casa"""
+        if not self.campos:
+            self.indice_campos = QuadTree(0, 0, mundo_ancho, mundo_alto)
+        
         for casa_nombre, posicion_castillo in ubicaciones_castillos.items():
             if casa_nombre not in casas:
                 continue
@@ -212,7 +242,7 @@ class GestorAgricultura:
                         casa=casa_nombre,
                         semanas_crecimiento=random.randint(0, 8)  # Estados variados
                     )
-                    self.campos.append(campo)
+                    self.agregar_campo(campo)
                     campos_creados += 1
                 
                 intentos += 1
@@ -237,7 +267,7 @@ class GestorAgricultura:
                     cantidad=random.randint(5, 20),
                     casa=casa_nombre
                 )
-                self.rebanos.append(rebano)
+                self.agregar_rebano(rebano)
     
     def actualizar_agricultura(self):
         """Actualiza todos los campos (crecimiento)"""
@@ -286,36 +316,34 @@ class GestorAgricultura:
         
         return produccion
     
-    def obtener_campos_en_viewport(self, camara, mundo_ancho: int, mundo_alto: int) -> List[Campo]:
+    def obtener_campos_en_viewport(self, camara, mundo_ancho: int, mundo_alto: int,
+                                   ancho_pantalla: int = ANCHO, alto_pantalla: int = ALTO) -> List[Campo]:
         """Retorna solo los campos visibles en la cámara"""
-        # Obtener bounds del viewport
-        try:
-            x_min, y_min, x_max, y_max = camara.obtener_viewport_bounds(1600, 900)
-        except:
-            # Fallback si hay error
-            return self.campos[:50]  # Retornar primeros 50
-        
-        campos_visibles = []
-        for campo in self.campos:
-            # Verificar si el campo está en el viewport
-            if (x_min - campo.ancho <= campo.x <= x_max + campo.ancho and
-                y_min - campo.alto <= campo.y <= y_max + campo.alto):
-                campos_visibles.append(campo)
+        x_min, y_min, x_max, y_max = camara.obtener_viewport_bounds(ancho_pantalla, alto_pantalla)
         
-        return campos_visibles
+        # Se consulta por el centro con un margen del campo más grande y luego
+        # se filtra con la extensión real de cada campo
+        m = self._max_tam_campo
+        candidatos = self.indice_campos.consultar_rect(x_min - m, y_min - m, x_max + m, y_max + m)
+        return [campo for campo in candidatos
+                if (x_min - campo.ancho <= campo.x <= x_max + campo.ancho and
+                    y_min - campo.alto <= campo.y <= y_max + campo.alto)]
     
-    def obtener_rebanos_en_viewport(self, camara) -> List[Rebano]:
+    def obtener_rebanos_en_viewport(self, camara, ancho_pantalla: int = ANCHO,
+                                    alto_pantalla: int = ALTO) -> List[Rebano]:
         """Retorna solo los rebaños visibles en la cámara"""
-        try:
-            x_min, y_min, x_max, y_max = camara.obtener_viewport_bounds(1600, 900)
-        except:
-            return self.rebanos[:20]
-        
-        rebanos_visibles = []
-        for rebano in self.rebanos:
-            margen = 100
-            if (x_min - margen <= rebano.x <= x_max + margen and
-                y_min - margen <= rebano.y <= y_max + margen):
-                rebanos_visibles.append(rebano)
-        
-        return rebanos_visibles
+        x_min, y_min, x_max, y_max = camara.obtener_viewport_bounds(ancho_pantalla, alto_pantalla)
+        margen = 100
+        return self.indice_rebanos.consultar_rect(x_min - margen, y_min - margen,
+                                                  x_max + margen, y_max + margen)
+    
+    def obtener_campos_de_casa_en_radio(self, casa: str, x: float, y: float,
+                                        radio: float) -> List[Campo]:
+        """
+        🚀 OPTIMIZACIÓN: Campos de una casa a distancia <= radio de (x, y)
+        Útil para ubicar tareas agrícolas cerca del NPC que las hará
+        """
+        indice = self.campos_por_casa.get(casa)
+        if indice is None:
+            return []
+        return indice.consultar_radio(x, y, radio)
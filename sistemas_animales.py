@@ -9,8 +9,9 @@ Animales que se ven en el mapa:
 """
 import random
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from enum import Enum
+from sistema_espacial import QuadTree
 
 
 class TipoAnimal(Enum):
@@ -34,7 +35,7 @@ class TipoAnimal(Enum):
     AGUILA = "aguila"
 
 
-@dataclass
+@dataclass(slots=True)
 class Animal:
     """Un animal en el mapa"""
     tipo: TipoAnimal
@@ -178,6 +179,18 @@ class GestorAnimales:
         self.animales: List[Animal] = []
         self.siguiente_id = 1
         self.rebanos_por_casa: dict = {}  # {casa_nombre: [lista de IDs de animales]}
+        
+        # 🚀 OPTIMIZACIÓN: QuadTree con los animales vivos para consultas espaciales
+        self.indice: Optional[QuadTree] = None
+        # Muertos desde el último tick: se purgan de la lista una sola vez por tick
+        self.muertos_pendientes: set = set()
+    
+    def _reconstruir_indice(self, mundo_ancho: int, mundo_alto: int):
+        """Reconstruye el índice espacial con los animales vivos"""
+        self.indice = QuadTree(0, 0, mundo_ancho, mundo_alto)
+        for animal in self.animales:
+            if animal.vivo:
+                self.indice.insertar(animal.id, animal.x, animal.y, animal)
     
     def inicializar_animales(self, mundo_ancho: int, mundo_alto: int, casas_ubicaciones: dict = None, gestor_agricultura=None):
         """
@@ -309,25 +322,47 @@ class GestorAnimales:
             animal = Animal(tipo=TipoAnimal.AGUILA, x=x, y=y, id=self.siguiente_id)
             self.animales.append(animal)
             self.siguiente_id += 1
+        
+        self._reconstruir_indice(mundo_ancho, mundo_alto)
     
     def actualizar_animales(self, mundo_ancho: int, mundo_alto: int):
-        """Actualiza todos los animales"""
+        """Actualiza todos los animales y su posición en el índice"""
+        if self.muertos_pendientes:
+            self._purgar_muertos()
+        if self.indice is None:
+            self._reconstruir_indice(mundo_ancho, mundo_alto)
+        indice = self.indice
         for animal in self.animales:
             animal.actualizar(mundo_ancho, mundo_alto)
+            indice.mover(animal.id, animal.x, animal.y, animal)
     
     def obtener_animales_en_viewport(self, x_min: float, y_min: float, 
                                      x_max: float, y_max: float) -> List[Animal]:
         """Obtiene animales visibles en el viewport"""
-        animales_visibles = []
-        for animal in self.animales:
-            if animal.vivo and x_min <= animal.x <= x_max and y_min <= animal.y <= y_max:
-                animales_visibles.append(animal)
-        return animales_visibles
+        if self.indice is None:
+            return [a for a in self.animales
+                    if a.vivo and x_min <= a.x <= x_max and y_min <= a.y <= y_max]
+        return self.indice.consultar_rect(x_min, y_min, x_max, y_max)
     
     def matar_animales_en_radio(self, x: float, y: float, radio: float, probabilidad: float = 1.0):
-        """Mata animales en un radio (para eventos)"""
-        for animal in self.animales:
-            if animal.vivo:
-                distancia = ((animal.x - x)**2 + (animal.y - y)**2)**0.5
-                if distancia < radio and random.random() < probabilidad:
-                    animal.vivo = False
+        """Mata animales en un radio (para eventos); salen del índice ya y de la lista en el próximo tick"""
+        if self.indice is None:
+            candidatos = [a for a in self.animales if a.vivo]
+        else:
+            candidatos = self.indice.consultar_radio(x, y, radio)
+        
+        for animal in candidatos:
+            distancia2 = (animal.x - x)**2 + (animal.y - y)**2
+            if distancia2 < radio * radio and random.random() < probabilidad:
+                animal.vivo = False
+                self.muertos_pendientes.add(animal.id)
+                if self.indice is not None:
+                    self.indice.remover(animal.id)
+    
+    def _purgar_muertos(self):
+        """Elimina de la lista y de los rebaños a todos los muertos del tick en una pasada"""
+        muertos = self.muertos_pendientes
+        self.muertos_pendientes = set()
+        self.animales = [a for a in self.animales if a.id not in muertos]
+        for casa, ids in self.rebanos_por_casa.items():
+            self.rebanos_por_casa[casa] = [i for i in ids if i not in muertos]
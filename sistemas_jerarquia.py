@@ -2,8 +2,9 @@
 jerarquia_got.py - Sistema de Jerarquía Social y Árbol Genealógico
 Maneja rangos sociales, organización por trabajo y familias nobles
 """
+from bisect import bisect_left
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Set
+from typing import Iterable, List, Dict, Optional, Set, Tuple, FrozenSet, Hashable
 from enum import Enum
 
 
@@ -25,13 +26,13 @@ class RangoSocial(Enum):
 @dataclass
 class NodoFamiliar:
     """Nodo del árbol genealógico"""
-    npc_id: str
+    npc_id: int
     nombre: str
     es_gobernante: bool = False
-    conyuge_id: Optional[str] = None
-    padre_id: Optional[str] = None
-    madre_id: Optional[str] = None
-    hijos_ids: List[str] = field(default_factory=list)
+    conyuge_id: Optional[int] = None
+    padre_id: Optional[int] = None
+    madre_id: Optional[int] = None
+    hijos_ids: List[int] = field(default_factory=list)
     rango: RangoSocial = RangoSocial.PLEBEYO
 
 
@@ -40,24 +41,27 @@ class JerarquiaReino:
     """Jerarquía completa de un reino"""
     nombre_reino: str
     casa_gobernante: str
-    gobernante_id: Optional[str] = None
+    gobernante_id: Optional[int] = None
     
     # Organización por rango
-    por_rango: Dict[RangoSocial, List[str]] = field(default_factory=dict)
+    por_rango: Dict[RangoSocial, List[int]] = field(default_factory=dict)
     
     # Árbol genealógico de la familia gobernante
-    arbol_familiar: Dict[str, NodoFamiliar] = field(default_factory=dict)
+    arbol_familiar: Dict[int, NodoFamiliar] = field(default_factory=dict)
+    
+    # Línea de sucesión de la casa gobernante (la mantiene GestorJerarquia)
+    linea: Optional['LineaSucesion'] = None
     
     # Organización por trabajo/profesión
-    mineros: List[str] = field(default_factory=list)
-    agricultores: List[str] = field(default_factory=list)
-    soldados: List[str] = field(default_factory=list)
-    artesanos: List[str] = field(default_factory=list)
-    comerciantes: List[str] = field(default_factory=list)
-    guardias: List[str] = field(default_factory=list)
-    maestres: List[str] = field(default_factory=list)
-    
-    def agregar_npc(self, npc_id: str, nombre: str, rango: RangoSocial):
+    mineros: List[int] = field(default_factory=list)
+    agricultores: List[int] = field(default_factory=list)
+    soldados: List[int] = field(default_factory=list)
+    artesanos: List[int] = field(default_factory=list)
+    comerciantes: List[int] = field(default_factory=list)
+    guardias: List[int] = field(default_factory=list)
+    maestres: List[int] = field(default_factory=list)
+    
+    def agregar_npc(self, npc_id: int, nombre: str, rango: RangoSocial):
         """Agrega un NPC a la jerarquía"""
         if rango not in self.por_rango:
             self.por_rango[rango] = []
@@ -65,7 +69,7 @@ class JerarquiaReino:
         if npc_id not in self.por_rango[rango]:
             self.por_rango[rango].append(npc_id)
     
-    def establecer_gobernante(self, npc_id: str, nombre: str):
+    def establecer_gobernante(self, npc_id: int, nombre: str):
         """Establece el gobernante del reino"""
         self.gobernante_id = npc_id
         self.agregar_npc(npc_id, nombre, RangoSocial.REY)
@@ -79,10 +83,10 @@ class JerarquiaReino:
                 rango=RangoSocial.REY
             )
     
-    def agregar_familiar(self, npc_id: str, nombre: str, rango: RangoSocial,
-                        padre_id: Optional[str] = None,
-                        madre_id: Optional[str] = None,
-                        conyuge_id: Optional[str] = None):
+    def agregar_familiar(self, npc_id: int, nombre: str, rango: RangoSocial,
+                        padre_id: Optional[int] = None,
+                        madre_id: Optional[int] = None,
+                        conyuge_id: Optional[int] = None):
         """Agrega un miembro de la familia gobernante al árbol"""
         nodo = NodoFamiliar(
             npc_id=npc_id,
@@ -97,17 +101,21 @@ class JerarquiaReino:
         self.agregar_npc(npc_id, nombre, rango)
         
         # Actualizar relaciones de padres
-        if padre_id and padre_id in self.arbol_familiar:
+        if padre_id is not None and padre_id in self.arbol_familiar:
             if npc_id not in self.arbol_familiar[padre_id].hijos_ids:
                 self.arbol_familiar[padre_id].hijos_ids.append(npc_id)
         
-        if madre_id and madre_id in self.arbol_familiar:
+        if madre_id is not None and madre_id in self.arbol_familiar:
             if npc_id not in self.arbol_familiar[madre_id].hijos_ids:
                 self.arbol_familiar[madre_id].hijos_ids.append(npc_id)
     
-    def obtener_heredero(self) -> Optional[str]:
-        """Obtiene el heredero del reino (primogénito del gobernante)"""
-        if not self.gobernante_id or self.gobernante_id not in self.arbol_familiar:
+    def obtener_heredero(self) -> Optional[int]:
+        """Obtiene el heredero del reino (cabeza de la línea de sucesión)"""
+        if self.linea is not None and self.linea.lord is not None and self.linea.lord.id == self.gobernante_id:
+            heredero = self.linea.heredero()
+            return heredero.id if heredero is not None else None
+        
+        if self.gobernante_id is None or self.gobernante_id not in self.arbol_familiar:
             return None
         
         gobernante = self.arbol_familiar[self.gobernante_id]
@@ -117,27 +125,279 @@ class JerarquiaReino:
         
         return None
     
-    def obtener_familia_cercana(self, npc_id: str) -> Dict[str, List[str]]:
+    def obtener_familia_cercana(self, npc_id: int) -> Dict[str, List[int]]:
         """Obtiene la familia cercana de un NPC"""
         if npc_id not in self.arbol_familiar:
             return {}
         
         nodo = self.arbol_familiar[npc_id]
         familia = {
-            "conyuge": [nodo.conyuge_id] if nodo.conyuge_id else [],
-            "padre": [nodo.padre_id] if nodo.padre_id else [],
-            "madre": [nodo.madre_id] if nodo.madre_id else [],
+            "conyuge": [nodo.conyuge_id] if nodo.conyuge_id is not None else [],
+            "padre": [nodo.padre_id] if nodo.padre_id is not None else [],
+            "madre": [nodo.madre_id] if nodo.madre_id is not None else [],
             "hijos": nodo.hijos_ids.copy()
         }
         
         return familia
 
 
+class IndiceGenealogico:
+    """
+    Índice genealógico de todos los NPCs (vivos y muertos).
+    
+    Guarda padre/madre -> hijos, así que hijos y hermanos salen en O(familia)
+    sin recorrer la población. Los padres de un NPC no cambian nunca, de modo que
+    ancestros y generación se memoizan; la memoria solo se vacía cuando alguien
+    se registra después que sus propios hijos.
+    """
+    
+    def __init__(self):
+        self.npcs: Dict[Hashable, object] = {}
+        self.padres: Dict[Hashable, Tuple[Optional[Hashable], Optional[Hashable]]] = {}
+        self.hijos_de: Dict[Hashable, List[Hashable]] = {}
+        self._generacion: Dict[Hashable, int] = {}
+        self._ancestros: Dict[Tuple[Hashable, int], FrozenSet[Hashable]] = {}
+    
+    def registrar(self, npc_id: Hashable, padre_id: Optional[Hashable] = None,
+                  madre_id: Optional[Hashable] = None, npc=None):
+        """Registra un NPC y sus padres (idempotente)"""
+        if npc_id in self.padres:
+            if npc is not None:
+                self.npcs[npc_id] = npc
+            return
+        self.padres[npc_id] = (padre_id, madre_id)
+        self.npcs[npc_id] = npc
+        for progenitor in (padre_id, madre_id):
+            if progenitor is not None:
+                self.hijos_de.setdefault(progenitor, []).append(npc_id)
+        if npc_id in self.hijos_de:
+            # Llegó tarde: lo memoizado de sus descendientes ya no vale
+            self._generacion.clear()
+            self._ancestros.clear()
+    
+    def hijos(self, npc_id: Hashable) -> List:
+        """NPCs hijos (de padre o madre) de un NPC"""
+        return [self.npcs[h] for h in self.hijos_de.get(npc_id, ())]
+    
+    def hermanos_ids(self, npc_id: Hashable, completos: bool = False) -> Set[Hashable]:
+        """Ids de los hermanos; con completos=True solo los de padre y madre"""
+        padre_id, madre_id = self.padres.get(npc_id, (None, None))
+        por_padre = set(self.hijos_de.get(padre_id, ())) if padre_id is not None else set()
+        por_madre = set(self.hijos_de.get(madre_id, ())) if madre_id is not None else set()
+        hermanos = (por_padre & por_madre) if completos else (por_padre | por_madre)
+        hermanos.discard(npc_id)
+        return hermanos
+    
+    def generacion(self, npc_id: Hashable) -> int:
+        """Profundidad en el árbol: 0 sin padres conocidos"""
+        memo = self._generacion.get(npc_id)
+        if memo is not None:
+            return memo
+        # Iterativo: los linajes largos no deben tocar el límite de recursión
+        pila = [npc_id]
+        while pila:
+            actual = pila[-1]
+            pendientes = [p for p in self.padres.get(actual, (None, None))
+                          if p is not None and p not in self._generacion]
+            if pendientes:
+                pila.extend(pendientes)
+                continue
+            pila.pop()
+            self._generacion[actual] = 1 + max(
+                (self._generacion[p] for p in self.padres.get(actual, (None, None)) if p is not None),
+                default=-1)
+        return self._generacion[npc_id]
+    
+    def ancestros(self, npc_id: Hashable, generaciones: int) -> FrozenSet[Hashable]:
+        """Ids de los ancestros hasta `generaciones` atrás (1 = padres)"""
+        if generaciones <= 0:
+            return frozenset()
+        clave = (npc_id, generaciones)
+        memo = self._ancestros.get(clave)
+        if memo is None:
+            resultado = set()
+            for progenitor in self.padres.get(npc_id, (None, None)):
+                if progenitor is not None:
+                    resultado.add(progenitor)
+                    resultado |= self.ancestros(progenitor, generaciones - 1)
+            memo = self._ancestros[clave] = frozenset(resultado)
+        return memo
+    
+    def es_ancestro(self, ancestro_id: Hashable, npc_id: Hashable) -> bool:
+        """¿ancestro_id es ancestro (a cualquier distancia) de npc_id?"""
+        distancia = self.generacion(npc_id) - self.generacion(ancestro_id)
+        return distancia > 0 and ancestro_id in self.ancestros(npc_id, distancia)
+    
+    def son_parientes(self, a: Hashable, b: Hashable, generaciones: int = 2) -> bool:
+        """Parentesco de sangre a `generaciones` o menos (2 = hasta primos)"""
+        if a == b:
+            return True
+        ancestros_a = self.ancestros(a, generaciones)
+        ancestros_b = self.ancestros(b, generaciones)
+        return a in ancestros_b or b in ancestros_a or not ancestros_a.isdisjoint(ancestros_b)
+    
+    def parientes_ids(self, npc_id: Hashable, generaciones: int = 2) -> Set[Hashable]:
+        """Ids de la familia de sangre: descendientes de sus ancestros cercanos"""
+        raices = set(self.ancestros(npc_id, generaciones))
+        raices.add(npc_id)
+        familia = set(raices)
+        frontera = list(raices)
+        for _ in range(2 * generaciones):
+            siguiente = []
+            for actual in frontera:
+                for hijo in self.hijos_de.get(actual, ()):
+                    if hijo not in familia:
+                        familia.add(hijo)
+                        siguiente.append(hijo)
+            frontera = siguiente
+        familia.discard(npc_id)
+        return familia
+    
+    def __len__(self) -> int:
+        return len(self.padres)
+
+
+class LineaSucesion:
+    """
+    Línea de sucesión ordenada de una casa, mantenida de forma incremental.
+    
+    Sigue las mismas reglas que encontrar_heredero: hijos varones, hijas, hermanos
+    varones de la casa (mismo padre; sin padre conocido, los varones de la casa sin
+    padre) y varones de la casa con título; dentro de cada bloque, del mayor al
+    menor (en el último, antes el de más título).
+    Nacimientos, muertes y cambios de título o de casa solo reubican al NPC afectado
+    (búsqueda binaria), así que heredero() es O(1) y exportar() da la cadena entera.
+    """
+    
+    TIPOS = ("hijo_legitimo", "hija_legitima", "hermano", "pariente")
+    
+    def __init__(self, casa: str, genealogia: IndiceGenealogico):
+        self.casa = casa
+        self.genealogia = genealogia
+        self.lord = None
+        self.semana: Optional[int] = None  # Semana de la última reconstrucción completa
+        self._claves: List[tuple] = []
+        self._ids: List[Hashable] = []
+        self._clave_de: Dict[Hashable, tuple] = {}
+    
+    def establecer_lord(self, lord, semana: int, miembros: Iterable = ()):
+        """
+        Reconstruye la línea en O(k log k) sobre los hijos del lord y los
+        `miembros` de la casa (hermanos y varones con título salen de ellos)
+        """
+        genealogia = self.genealogia
+        self.lord = lord
+        self.semana = semana
+        self._clave_de.clear()
+        candidatos = {npc.id: npc for npc in miembros}
+        for npc_id in genealogia.hijos_de.get(lord.id, ()):
+            candidatos.setdefault(npc_id, genealogia.npcs.get(npc_id))
+        for npc in candidatos.values():
+            if npc is not None:
+                clave = self._clave(npc, semana)
+                if clave is not None:
+                    self._clave_de[npc.id] = clave
+        orden = sorted(self._clave_de.items(), key=lambda par: par[1])
+        self._claves = [clave for _, clave in orden]
+        self._ids = [npc_id for npc_id, _ in orden]
+    
+    def al_dia(self, lord, semana: int) -> bool:
+        """¿La línea es de este lord y se reconstruyó esta semana?"""
+        return self.lord is not None and self.lord.id == lord.id and self.semana == semana
+    
+    def _bloque(self, npc) -> Optional[Tuple[int, int]]:
+        """(bloque, prestigio del título) del NPC en esta línea, o None si no hereda"""
+        from enums_got import Genero, TituloNoble
+        
+        lord = self.lord
+        if lord is None or not npc.vivo or npc.id == lord.id:
+            return None
+        varon = npc.sexo == Genero.MASCULINO
+        if npc.padre_id == lord.id:
+            return (0 if varon else 1), 0
+        if not varon or npc.casa != self.casa:
+            return None
+        if npc.padre_id == lord.padre_id:
+            return 2, 0
+        orden_titulos = {TituloNoble.PRINCIPE: 1, TituloNoble.LORD: 2, TituloNoble.CABALLERO: 3}
+        if npc.titulo in orden_titulos:
+            return 3, orden_titulos[npc.titulo]
+        return None
+    
+    def _clave(self, npc, semana: int) -> Optional[tuple]:
+        """Clave de orden del NPC en la línea, o None si no hereda"""
+        bloque = self._bloque(npc)
+        if bloque is None:
+            return None
+        # Año de nacimiento: no cambia con las semanas, así que el orden tampoco.
+        # A igual edad, el id (orden de creación, como el recorrido de juego.npcs)
+        nacimiento = semana // 52 - npc.calcular_edad(semana)
+        return (*bloque, nacimiento, npc.id)
+    
+    def actualizar(self, npc, semana: int):
+        """Recoloca a un NPC tras nacer o cambiar de título o de casa"""
+        if self.lord is None:
+            return
+        bloque = self._bloque(npc)
+        anterior = self._clave_de.get(npc.id)
+        if anterior is not None and bloque is not None and anterior[:2] == bloque:
+            return
+        if anterior is not None:
+            self.quitar(npc.id)
+        if bloque is None:
+            return
+        clave = self._clave(npc, semana)
+        pos = bisect_left(self._claves, clave)
+        self._claves.insert(pos, clave)
+        self._ids.insert(pos, npc.id)
+        self._clave_de[npc.id] = clave
+    
+    def quitar(self, npc_id: Hashable):
+        """Saca a un NPC (muerto o desheredado) de la línea"""
+        clave = self._clave_de.pop(npc_id, None)
+        if clave is None:
+            return
+        pos = bisect_left(self._claves, clave)
+        del self._claves[pos]
+        del self._ids[pos]
+    
+    def heredero(self):
+        """NPC que hereda si el lord muere ahora (O(1); los muertos no notificados se descartan)"""
+        while self._ids:
+            npc = self.genealogia.npcs.get(self._ids[0])
+            if npc is not None and npc.vivo:
+                return npc
+            self.quitar(self._ids[0])
+        return None
+    
+    def tipo_heredero(self) -> Optional[str]:
+        """Tipo de sucesión del heredero actual"""
+        return self.TIPOS[self._claves[0][0]] if self._claves else None
+    
+    def exportar(self) -> List[Dict]:
+        """Cadena completa de sucesión para la interfaz"""
+        linea = []
+        for posicion, (clave, npc_id) in enumerate(zip(self._claves, self._ids), 1):
+            npc = self.genealogia.npcs.get(npc_id)
+            linea.append({
+                "posicion": posicion,
+                "id": npc_id,
+                "nombre": getattr(npc, 'nombre', str(npc_id)),
+                "tipo": self.TIPOS[clave[0]],
+            })
+        return linea
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
 class GestorJerarquia:
     """Gestiona la jerarquía de todos los reinos"""
     
     def __init__(self):
         self.jerarquias: Dict[str, JerarquiaReino] = {}
+        self.genealogia = IndiceGenealogico()
+        self.lineas: Dict[str, LineaSucesion] = {}
     
     def crear_jerarquia_reino(self, nombre_reino: str, casa_gobernante: str):
         """Crea la jerarquía de un reino"""
@@ -146,7 +406,52 @@ class GestorJerarquia:
             casa_gobernante=casa_gobernante
         )
     
-    def actualizar_reino(self, nombre_reino: str, npcs_reino: List, gobernante_npc=None):
+    def registrar_npc(self, npc):
+        """Registra un NPC (al crearlo o nacer) en el índice genealógico"""
+        self.genealogia.registrar(npc.id, getattr(npc, 'padre_id', None),
+                                  getattr(npc, 'madre_id', None), npc)
+    
+    def sincronizar(self, npcs: List, semana: int):
+        """
+        Registra a los NPCs que aún no estén en el índice (p. ej. nacidos desde
+        la última actualización) y los ubica en las líneas: una pasada con
+        búsqueda O(1) por NPC
+        """
+        padres = self.genealogia.padres
+        for npc in npcs:
+            if npc.id not in padres:
+                self.notificar_nacimiento(npc, semana)
+    
+    def establecer_lord_casa(self, casa: str, lord, semana: int, miembros: Iterable = ()) -> LineaSucesion:
+        """Fija el lord de una casa y reconstruye su línea con los `miembros` de la casa"""
+        linea = self.lineas.get(casa)
+        if linea is None:
+            linea = self.lineas[casa] = LineaSucesion(casa, self.genealogia)
+        self.registrar_npc(lord)
+        linea.establecer_lord(lord, semana, miembros)
+        return linea
+    
+    def notificar_nacimiento(self, npc, semana: int):
+        """Registra un recién nacido y lo sitúa en las líneas de sucesión"""
+        self.registrar_npc(npc)
+        self.notificar_cambio(npc, semana)
+    
+    def notificar_cambio(self, npc, semana: int):
+        """Cambio de título o de casa: recoloca al NPC en cada línea"""
+        for linea in self.lineas.values():
+            linea.actualizar(npc, semana)
+    
+    def notificar_muerte(self, npc):
+        """Saca a un NPC muerto de todas las líneas de sucesión"""
+        for linea in self.lineas.values():
+            linea.quitar(npc.id)
+    
+    def obtener_linea_sucesion(self, casa: str) -> List[Dict]:
+        """Línea de sucesión exportada de una casa (vacía si no se conoce)"""
+        linea = self.lineas.get(casa)
+        return linea.exportar() if linea is not None else []
+    
+    def actualizar_reino(self, nombre_reino: str, npcs_reino: List, gobernante_npc=None, semana: int = 0):
         """Actualiza la jerarquía de un reino con los NPCs actuales"""
         if nombre_reino not in self.jerarquias:
             return
@@ -169,6 +474,7 @@ class GestorJerarquia:
         
         # Clasificar NPCs
         for npc in npcs_reino:
+            self.registrar_npc(npc)
             if not npc.vivo:
                 continue
             
@@ -186,6 +492,12 @@ class GestorJerarquia:
                     madre_id=npc.madre_id if hasattr(npc, 'madre_id') else None,
                     conyuge_id=npc.conyuge_id if npc.casado else None
                 )
+        
+        # La línea se reconstruye con la casa completa (ya recorrida arriba):
+        # recoge nacimientos, muertes y cambios de título desde la última pasada
+        if gobernante_npc:
+            jerarquia.linea = self.establecer_lord_casa(
+                jerarquia.casa_gobernante, gobernante_npc, semana, npcs_reino)
     
     def _determinar_rango(self, npc) -> RangoSocial:
         """Determina el rango social de un NPC"""
@@ -234,7 +546,7 @@ class GestorJerarquia:
         jerarquia = self.jerarquias[nombre_reino]
         
         # Remover rango de rey del gobernante anterior
-        if jerarquia.gobernante_id:
+        if jerarquia.gobernante_id is not None:
             antiguo_id = jerarquia.gobernante_id
             if antiguo_id in jerarquia.arbol_familiar:
                 jerarquia.arbol_familiar[antiguo_id].es_gobernante = False
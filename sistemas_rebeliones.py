@@ -28,7 +28,7 @@ class TipoCasaMenor(Enum):
     LORD_VASALLO = "Lord Vasallo"     # Señores vasallos de importancia
 
 
-@dataclass
+@dataclass(slots=True)
 class CasaMenor:
     """Una casa menor/vasalla dentro de un reino"""
     nombre: str
@@ -1,15 +1,19 @@
 """
 Sistema de Gestión de Tareas Optimizado para Game of Thrones
-Usa Priority Heap + Deque para asignación inteligente y balanceada
+Usa Priority Heap + cola de ociosos por casa para asignación inteligente y balanceada
 """
 
-from collections import deque
-from typing import List, Dict, Optional, Tuple
+from collections import OrderedDict, defaultdict, deque
+from itertools import count, islice
+from typing import Callable, Iterator, List, Dict, Optional, Set, Tuple
 from dataclasses import dataclass, field
-from priority_heap import PriorityHeap
+from priority_heap import IndexedPriorityHeap, PriorityHeap
+from sistema_asignacion import asignar_minimo_costo
 from enum import Enum
 import random
 
+import numpy as np
+
 
 class NecesidadCasa(Enum):
     """Necesidades críticas de una casa"""
@@ -38,7 +42,86 @@ class TipoTarea(Enum):
     ADMINISTRACION = "administracion"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class EspecificacionTarea:
+    """Datos fijos de un tipo de tarea: duración, recompensas y rangos de costo"""
+    duracion_semanas: int
+    oro: int = 0
+    comida: int = 0
+    madera: int = 0
+    costo_madera: Tuple[int, int] = (0, 0)  # (mínimo, máximo) para iniciar
+    costo_comida: Tuple[int, int] = (0, 0)
+
+
+# 🚀 OPTIMIZACIÓN: tabla estática por tipo (antes cada helper rearmaba su dict en cada llamada)
+ESPECIFICACIONES_TAREA: Dict[TipoTarea, EspecificacionTarea] = {
+    TipoTarea.MINERIA: EspecificacionTarea(3, oro=50, costo_comida=(50, 100)),
+    TipoTarea.AGRICULTURA: EspecificacionTarea(2, comida=30),
+    TipoTarea.COMERCIO: EspecificacionTarea(2, oro=80),
+    TipoTarea.ENTRENAMIENTO: EspecificacionTarea(2, costo_comida=(40, 80)),
+    TipoTarea.CONSTRUCCION: EspecificacionTarea(4, oro=100, madera=10,  # También genera algo de madera procesada
+                                                costo_madera=(150, 300), costo_comida=(100, 200)),
+    TipoTarea.HERRERIA: EspecificacionTarea(3, oro=50, costo_madera=(20, 40)),  # Carbón/leña
+    TipoTarea.CARPINTERIA: EspecificacionTarea(2, oro=40, madera=15,
+                                               costo_madera=(50, 100), costo_comida=(30, 60)),
+    TipoTarea.GUARDIA: EspecificacionTarea(999),  # Continuo
+    TipoTarea.CAZA: EspecificacionTarea(1, comida=25),
+    TipoTarea.PESCA: EspecificacionTarea(1, comida=20),
+    TipoTarea.ALQUIMIA: EspecificacionTarea(5),
+    TipoTarea.ESTUDIO: EspecificacionTarea(4),
+    TipoTarea.ARTESANIA: EspecificacionTarea(3, oro=30),
+    TipoTarea.ADMINISTRACION: EspecificacionTarea(999),  # Continuo
+}
+
+TIPOS_TAREA: Tuple[TipoTarea, ...] = tuple(TipoTarea)
+# Tareas que generan recursos sin costo (preferidas cuando la casa anda corta)
+TIPOS_SIN_COSTO: Tuple[TipoTarea, ...] = (TipoTarea.MINERIA, TipoTarea.AGRICULTURA, TipoTarea.CAZA,
+                                          TipoTarea.PESCA, TipoTarea.COMERCIO, TipoTarea.GUARDIA)
+
+# IDs de tarea monótonos: id(object()) se repetía en cuanto el objeto se liberaba
+_ids_tarea = count(1)
+
+
+# Oficio (nombre de la profesión, como se registra en el índice) -> tarea que mejor hace
+OFICIO_A_TIPOTAREA: Dict[str, TipoTarea] = {
+    "leñador": TipoTarea.CARPINTERIA,
+    "constructor": TipoTarea.CONSTRUCCION,
+    "herrero": TipoTarea.HERRERIA,
+    "militar": TipoTarea.ENTRENAMIENTO,
+    "minero": TipoTarea.MINERIA,
+    "agricultor": TipoTarea.AGRICULTURA,
+    "ganadero": TipoTarea.CAZA,
+    "comerciante": TipoTarea.COMERCIO,
+    "pescador": TipoTarea.PESCA,
+    "diplomata": TipoTarea.ADMINISTRACION,
+}
+
+# Si no hay ocioso del oficio exacto, se prueba con estos (en orden) antes que con cualquiera
+TIPOS_AFINES: Dict[TipoTarea, Tuple[TipoTarea, ...]] = {
+    TipoTarea.MINERIA: (TipoTarea.HERRERIA,),
+    TipoTarea.AGRICULTURA: (TipoTarea.CAZA, TipoTarea.PESCA),
+    TipoTarea.COMERCIO: (TipoTarea.ADMINISTRACION,),
+    TipoTarea.ENTRENAMIENTO: (),
+    TipoTarea.CONSTRUCCION: (TipoTarea.CARPINTERIA,),
+    TipoTarea.HERRERIA: (TipoTarea.MINERIA,),
+    TipoTarea.CARPINTERIA: (TipoTarea.CONSTRUCCION,),
+    TipoTarea.GUARDIA: (TipoTarea.ENTRENAMIENTO,),
+    TipoTarea.CAZA: (TipoTarea.PESCA, TipoTarea.AGRICULTURA),
+    TipoTarea.PESCA: (TipoTarea.CAZA, TipoTarea.AGRICULTURA),
+    TipoTarea.ALQUIMIA: (TipoTarea.HERRERIA, TipoTarea.ADMINISTRACION),
+    TipoTarea.ESTUDIO: (TipoTarea.ADMINISTRACION, TipoTarea.COMERCIO),
+    TipoTarea.ARTESANIA: (TipoTarea.CARPINTERIA, TipoTarea.HERRERIA),
+    TipoTarea.ADMINISTRACION: (TipoTarea.COMERCIO,),
+}
+
+# Asignación óptima por lotes: tamaño máximo del problema y pesos del costo
+MAX_LOTE_ASIGNACION = 64  # NPCs y tareas por lote (el método húngaro es cúbico)
+DISTANCIA_POR_PUNTO = 100.0  # Unidades de mundo de caminata que cuestan 1 punto
+COSTO_AFINIDAD = {"oficio": 0.0, "afin": 2.0, "cualquiera": 5.0}
+PESO_PRIORIDAD = 1.0  # Con más tareas que NPCs, las urgentes ganan el lote
+
+
+@dataclass(slots=True)
 class Tarea:
     """Representa una tarea específica"""
     tipo: TipoTarea
@@ -62,7 +145,7 @@ class Tarea:
     # Metadata
     casa: str = ""
     ubicacion: Tuple[int, int] = (0, 0)
-    id_tarea: int = field(default_factory=lambda: id(object()))  # ID único
+    id_tarea: int = field(default_factory=_ids_tarea.__next__)  # ID único
     
     def __hash__(self):
         """Hacer hashable para uso en sets/dicts"""
@@ -99,21 +182,121 @@ class EstadoCasa:
         return NecesidadCasa.NORMAL
 
 
+class ColaOciosos:
+    """
+    Conjunto ordenado de NPCs ociosos de una casa.
+    🚀 OPTIMIZACIÓN: pertenencia, alta y baja en O(1) (antes `in deque` era O(n)).
+    Sin `prioridad` sale en orden de llegada (FIFO); con `prioridad(npc_id)`
+    sale primero el de puntaje más alto (p. ej. stamina o habilidad), y a
+    igual puntaje el que llegó antes. El puntaje se toma al entrar a la cola.
+    """
+    __slots__ = ("_orden", "_heap", "_prioridad")
+    
+    def __init__(self, prioridad: Optional[Callable[[int], float]] = None):
+        self._orden: "OrderedDict[int, None]" = OrderedDict()
+        self._prioridad = prioridad
+        self._heap: Optional[IndexedPriorityHeap] = None
+        if prioridad is not None:
+            self._heap = IndexedPriorityHeap()
+    
+    def agregar(self, npc_id: int) -> bool:
+        """Encola un NPC; False si ya estaba esperando"""
+        if npc_id in self._orden:
+            return False
+        self._orden[npc_id] = None
+        if self._heap is not None:
+            self._heap.push(npc_id, -self._prioridad(npc_id))
+        return True
+    
+    def quitar(self, npc_id: int) -> bool:
+        """Saca a un NPC de la cola (p. ej. porque murió o cambió de casa)"""
+        if npc_id not in self._orden:
+            return False
+        del self._orden[npc_id]
+        if self._heap is not None:
+            self._heap.remove(npc_id)
+        return True
+    
+    def primero(self) -> Optional[int]:
+        """Próximo NPC en salir, sin sacarlo"""
+        if self._heap is not None:
+            return self._heap.peek()
+        return next(iter(self._orden), None)
+    
+    def primeros(self, k: int) -> List[int]:
+        """Los k próximos NPCs en salir, en el mismo orden que daría siguiente(), sin sacarlos"""
+        if self._heap is not None:
+            return [npc_id for npc_id, _ in self._heap.nsmallest(k)]
+        return list(islice(self._orden, k))
+    
+    def siguiente(self) -> int:
+        """Saca y retorna el próximo NPC (KeyError si la cola está vacía)"""
+        if self._heap is not None:
+            npc_id = self._heap.pop()
+            if npc_id is None:
+                raise KeyError("cola de ociosos vacía")
+            del self._orden[npc_id]
+            return npc_id
+        return self._orden.popitem(last=False)[0]
+    
+    def __contains__(self, npc_id: int) -> bool:
+        return npc_id in self._orden
+    
+    def __len__(self) -> int:
+        return len(self._orden)
+    
+    def __bool__(self) -> bool:
+        return bool(self._orden)
+    
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._orden)
+
+
 class GestorTareas:
     """
     Gestor inteligente de tareas usando:
-    - Priority Heap: Para priorización dinámica
-    - Deque: Para balanceo de carga entre NPCs
+    - Priority Heap por casa: Para priorización dinámica
+    - Cola de ociosos por casa (ColaOciosos): Para balanceo de carga entre NPCs
+    - Turno rotativo entre casas: ninguna casa acapara las asignaciones
     """
     
-    def __init__(self):
-        self.heap_tareas = PriorityHeap()  # Tareas pendientes priorizadas
-        self.cola_npcs_ociosos = deque()  # NPCs sin tarea
+    def __init__(self, prioridad_ociosos: Optional[Callable[[int], float]] = None,
+                 asignacion_optima: bool = False,
+                 ubicador: Optional[Callable[[str, TipoTarea], Tuple[int, int]]] = None,
+                 posicion_npc: Optional[Callable[[int], Tuple[float, float]]] = None,
+                 descanso_restante: Optional[Callable[[int], float]] = None):
+        # Modo por lotes: cada ronda resuelve NPCs x tareas con costo mínimo
+        # (distancia + oficio - prioridad) en lugar de FIFO x más prioritaria
+        self.asignacion_optima = asignacion_optima
+        self.ubicador = ubicador  # (casa, tipo) -> punto del reino donde se hace la tarea
+        self.posicion_npc = posicion_npc  # npc_id -> (x, y) actual
+        # Regla de descanso: un NPC cansado espera fuera de la cola hasta recuperarse
+        self.descanso_restante = descanso_restante  # npc_id -> segundos para poder trabajar (0 = ya)
+        # 🚀 OPTIMIZACIÓN: los que descansan, en un heap por hora estimada de despertar;
+        # cada ronda solo mira a los que ya vencieron
+        self.descansando = IndexedPriorityHeap()
+        self.reloj_descanso = 0.0  # Hora de la última llamada a despertar_descansados
+        
+        # 🚀 OPTIMIZACIÓN: tareas y ociosos particionados por casa; una asignación
+        # de una casa nunca toca (ni rechaza) trabajo de otra
+        self.tareas_por_casa: Dict[str, PriorityHeap] = {}  # casa -> tareas pendientes priorizadas
+        self.ociosos_por_casa: Dict[str, ColaOciosos] = {}  # casa -> NPCs sin tarea
+        # 🚀 OPTIMIZACIÓN: los mismos ociosos repartidos por la tarea que mejor hacen,
+        # para darle a cada tarea alguien del oficio sin recorrer la cola
+        self.ociosos_por_tipo: Dict[str, Dict[TipoTarea, ColaOciosos]] = {}  # casa -> tipo -> NPCs
+        self.tipo_en_cola: Dict[int, TipoTarea] = {}  # npc_id -> balde donde espera
+        self.asignaciones_por_oficio: Dict[str, int] = {"oficio": 0, "afin": 0, "cualquiera": 0}
+        self.prioridad_ociosos = prioridad_ociosos  # npc_id -> puntaje (None = FIFO)
+        self.casa_por_npc: Dict[int, str] = {}  # npc_id -> casa de su última cola
+        self.turno_casas: deque = deque()  # orden rotativo para el reparto justo
+        # 🚀 OPTIMIZACIÓN: casas con ociosos o recursos nuevos desde la última ronda;
+        # solo esas se procesan (dict como conjunto ordenado)
+        self.casas_pendientes: Dict[str, None] = {}
         self.tareas_activas: Dict[int, Tarea] = {}  # npc_id -> Tarea
         self.estados_casas: Dict[str, EstadoCasa] = {}
         
         # 🚀 OPTIMIZACIÓN: Índice de NPCs por oficio para acceso O(1)
-        self.npcs_por_oficio: Dict[str, List[int]] = {}  # oficio_nombre -> [npc_ids]
+        self.npcs_por_oficio: Dict[str, Set[int]] = {}  # oficio_nombre -> {npc_ids}
         self.oficio_por_npc: Dict[int, str] = {}  # npc_id -> oficio_nombre
         
         # Configuración de prioridades dinámicas
@@ -156,6 +339,8 @@ class GestorTareas:
             npcs_activos=npcs_activos,
             npcs_ociosos=npcs_ociosos
         )
+        # Recursos nuevos: tareas rechazadas por falta de recursos pueden arrancar
+        self.marcar_casa(casa)
         
         # Si hay NPCs ociosos, generar tareas urgentes
         if npcs_ociosos > 0:
@@ -172,24 +357,27 @@ class GestorTareas:
         # Generar 2-5 tareas según la necesidad
         num_tareas = min(estado.npcs_ociosos, random.randint(2, 5))
         
+        nuevas = []
         for _ in range(num_tareas):
             tipo_tarea = self._seleccionar_tipo_tarea(necesidad)
             prioridad = self._calcular_prioridad_dinamica(tipo_tarea, necesidad)
-            
-            tarea = Tarea(
-                tipo=tipo_tarea,
-                prioridad=prioridad,
-                duracion_semanas=self._duracion_por_tipo(tipo_tarea),
-                casa=casa,
-                oro_ganado=self._recompensa_oro(tipo_tarea),
-                comida_ganada=self._recompensa_comida(tipo_tarea),
-                madera_ganada=self._recompensa_madera(tipo_tarea),
-                costo_madera=self._costo_madera(tipo_tarea),  # 🆕 Costo en madera
-                costo_comida=self._costo_comida(tipo_tarea),  # 🆕 Costo en comida
-                experiencia=10
-            )
-            
-            self.agregar_tarea(tarea)
+            nuevas.append(self._nueva_tarea(tipo_tarea, prioridad, casa))
+        
+        self.agregar_tareas(nuevas)
+    
+    def _nueva_tarea(self, tipo: TipoTarea, prioridad: int, casa: str,
+                     experiencia: int = 10, con_costo: bool = True) -> Tarea:
+        """Arma una tarea de `tipo` a partir de su especificación estática"""
+        spec = ESPECIFICACIONES_TAREA[tipo]
+        costo_madera = costo_comida = 0
+        if con_costo:
+            if spec.costo_madera[1]:
+                costo_madera = random.randint(*spec.costo_madera)
+            if spec.costo_comida[1]:
+                costo_comida = random.randint(*spec.costo_comida)
+        return Tarea(tipo, prioridad, spec.duracion_semanas, casa=casa,
+                     oro_ganado=spec.oro, comida_ganada=spec.comida, madera_ganada=spec.madera,
+                     costo_madera=costo_madera, costo_comida=costo_comida, experiencia=experiencia)
     
     def _seleccionar_tipo_tarea(self, necesidad: NecesidadCasa) -> TipoTarea:
         """Selecciona tipo de tarea según necesidad"""
@@ -199,7 +387,7 @@ class GestorTareas:
                 return random.choice(tareas_criticas)
         
         # Si no hay necesidad crítica, tarea aleatoria
-        return random.choice(list(TipoTarea))
+        return random.choice(TIPOS_TAREA)
     
     def _calcular_prioridad_dinamica(self, tipo: TipoTarea, necesidad: NecesidadCasa) -> int:
         """Calcula prioridad dinámica según necesidad"""
@@ -213,74 +401,6 @@ class GestorTareas:
         
         return prioridad_base
     
-    def _duracion_por_tipo(self, tipo: TipoTarea) -> int:
-        """Duración en semanas por tipo de tarea"""
-        duraciones = {
-            TipoTarea.MINERIA: 3,
-            TipoTarea.AGRICULTURA: 2,
-            TipoTarea.COMERCIO: 2,
-            TipoTarea.ENTRENAMIENTO: 2,
-            TipoTarea.CONSTRUCCION: 4,
-            TipoTarea.HERRERIA: 3,
-            TipoTarea.CARPINTERIA: 2,
-            TipoTarea.GUARDIA: 999,  # Continuo
-            TipoTarea.CAZA: 1,
-            TipoTarea.PESCA: 1,
-            TipoTarea.ALQUIMIA: 5,
-            TipoTarea.ESTUDIO: 4,
-            TipoTarea.ARTESANIA: 3,
-            TipoTarea.ADMINISTRACION: 999,  # Continuo
-        }
-        return duraciones.get(tipo, 2)
-    
-    def _recompensa_oro(self, tipo: TipoTarea) -> int:
-        """Oro ganado al completar tarea"""
-        recompensas = {
-            TipoTarea.MINERIA: 50,
-            TipoTarea.COMERCIO: 80,
-            TipoTarea.HERRERIA: 50,
-            TipoTarea.CARPINTERIA: 40,
-            TipoTarea.ARTESANIA: 30,
-            TipoTarea.CONSTRUCCION: 100,
-        }
-        return recompensas.get(tipo, 0)
-    
-    def _recompensa_comida(self, tipo: TipoTarea) -> int:
-        """Comida ganada al completar tarea"""
-        recompensas = {
-            TipoTarea.AGRICULTURA: 30,
-            TipoTarea.CAZA: 25,
-            TipoTarea.PESCA: 20,
-        }
-        return recompensas.get(tipo, 0)
-    
-    def _recompensa_madera(self, tipo: TipoTarea) -> int:
-        """Madera ganada al completar tarea"""
-        recompensas = {
-            TipoTarea.CARPINTERIA: 15,
-            TipoTarea.CONSTRUCCION: 10,  # También genera algo de madera procesada
-        }
-        return recompensas.get(tipo, 0)
-    
-    def _costo_madera(self, tipo: TipoTarea) -> int:
-        """Madera requerida para iniciar tarea"""
-        costos = {
-            TipoTarea.CONSTRUCCION: random.randint(150, 300),  # Construcción requiere mucha madera
-            TipoTarea.CARPINTERIA: random.randint(50, 100),
-            TipoTarea.HERRERIA: random.randint(20, 40),  # Carbón/leña
-        }
-        return costos.get(tipo, 0)
-    
-    def _costo_comida(self, tipo: TipoTarea) -> int:
-        """Comida requerida para iniciar tarea (alimentar trabajadores)"""
-        costos = {
-            TipoTarea.CONSTRUCCION: random.randint(100, 200),
-            TipoTarea.MINERIA: random.randint(50, 100),
-            TipoTarea.CARPINTERIA: random.randint(30, 60),
-            TipoTarea.ENTRENAMIENTO: random.randint(40, 80),
-        }
-        return costos.get(tipo, 0)
-    
     def puede_iniciar_tarea(self, tarea: Tarea, casa) -> Tuple[bool, str]:
         """
         Verifica si una casa tiene recursos para iniciar una tarea
@@ -326,64 +446,263 @@ class GestorTareas:
         tarea.recursos_consumidos = True
         return True
     
+    def _heap_casa(self, casa: str) -> PriorityHeap:
+        """Heap de tareas pendientes de una casa (se crea al primer uso)"""
+        heap = self.tareas_por_casa.get(casa)
+        if heap is None:
+            heap = self.tareas_por_casa[casa] = PriorityHeap()
+            self.turno_casas.append(casa)
+        return heap
+    
+    def _cola_casa(self, casa: str) -> ColaOciosos:
+        """Cola de NPCs ociosos de una casa (se crea al primer uso)"""
+        cola = self.ociosos_por_casa.get(casa)
+        if cola is None:
+            cola = self.ociosos_por_casa[casa] = ColaOciosos(self.prioridad_ociosos)
+        return cola
+    
     def agregar_tarea(self, tarea: Tarea):
-        """Agrega una tarea al heap CON su prioridad correcta"""
+        """Agrega una tarea al heap de su casa CON su prioridad correcta"""
         # OPTIMIZACIÓN: Usar prioridad del heap en lugar de __lt__ de Tarea
         # Prioridad más BAJA = más urgente (se procesa primero)
         # Invertir prioridad: 10 (urgente) -> 0, 1 (baja) -> 9
         prioridad_heap = 10 - tarea.prioridad
-        self.heap_tareas.push(tarea, priority=prioridad_heap)
+        self._ubicar(tarea)
+        self._heap_casa(tarea.casa).push(tarea, priority=prioridad_heap)
+    
+    def _ubicar(self, tarea: Tarea):
+        """Le da a la tarea un punto dentro de su reino si todavía no tiene"""
+        if self.ubicador is not None and tarea.ubicacion == (0, 0):
+            tarea.ubicacion = self.ubicador(tarea.casa, tarea.tipo)
+    
+    def agregar_tareas(self, tareas: List[Tarea]):
+        """Agrega varias tareas de una vez (heapify en bloque por casa)"""
+        por_casa: Dict[str, List[Tuple[Tarea, int]]] = defaultdict(list)
+        for tarea in tareas:
+            self._ubicar(tarea)
+            por_casa[tarea.casa].append((tarea, 10 - tarea.prioridad))
+        for casa, pares in por_casa.items():
+            self._heap_casa(casa).push_many(pares)
+    
+    def registrar_npc_ocioso(self, npc_id: int, casa: Optional[str] = None):
+        """Registra un NPC sin tarea en la cola de su casa (por defecto, la última conocida)"""
+        if casa is None:
+            casa = self.casa_por_npc.get(npc_id, "")
+        anterior = self.casa_por_npc.get(npc_id)
+        if anterior is not None and anterior != casa:
+            # Cambió de casa: no puede seguir esperando en la cola vieja
+            self._quitar_ocioso(npc_id, anterior)
+        self.casa_por_npc[npc_id] = casa
+        if self.descanso_restante is not None:
+            espera = self.descanso_restante(npc_id)
+            if espera > 0:
+                # Cansado u ocupado: despertar_descansados lo encola cuando venza la espera
+                self.descansando.push(npc_id, self.reloj_descanso + espera)
+                return
+            self.descansando.remove(npc_id)
+        if self._cola_casa(casa).agregar(npc_id):
+            tipo = OFICIO_A_TIPOTAREA.get(self.oficio_por_npc.get(npc_id))
+            if tipo is not None:
+                self._balde(casa, tipo).agregar(npc_id)
+                self.tipo_en_cola[npc_id] = tipo
+            self.marcar_casa(casa)
+    
+    def despertar_descansados(self, ahora: float) -> int:
+        """
+        Encola a los NPCs cuyo descanso venció a la hora `ahora`: O(k log n) en los
+        vencidos. Si alguno aún no se recuperó (p. ej. deambuló), vuelve al heap con
+        una nueva estimación. Retorna cuántos entraron a la cola.
+        """
+        self.reloj_descanso = ahora
+        heap = self.descansando
+        entraron = 0
+        while heap and heap.peek_priority() <= ahora:
+            npc_id = heap.pop()
+            espera = self.descanso_restante(npc_id)
+            if espera > 0:
+                heap.push(npc_id, ahora + espera)
+                continue
+            self.registrar_npc_ocioso(npc_id, self.casa_por_npc.get(npc_id))
+            entraron += 1
+        return entraron
+    
+    def marcar_casa(self, casa: str):
+        """Anota que la casa tiene novedades (ociosos o recursos) para la próxima ronda"""
+        self.casas_pendientes[casa] = None
+    
+    def tomar_casas_pendientes(self) -> List[str]:
+        """Casas con novedades, en orden de llegada; el conjunto queda vacío"""
+        casas = list(self.casas_pendientes)
+        self.casas_pendientes.clear()
+        return casas
+    
+    def _balde(self, casa: str, tipo: TipoTarea) -> ColaOciosos:
+        """Ociosos de una casa cuyo oficio corresponde a `tipo` (se crea al primer uso)"""
+        baldes = self.ociosos_por_tipo.setdefault(casa, {})
+        balde = baldes.get(tipo)
+        if balde is None:
+            balde = baldes[tipo] = ColaOciosos(self.prioridad_ociosos)
+        return balde
+    
+    def _quitar_ocioso(self, npc_id: int, casa: str) -> bool:
+        """Saca a un NPC de la cola de su casa y de su balde de oficio - O(1)"""
+        cola = self.ociosos_por_casa.get(casa)
+        if cola is None or not cola.quitar(npc_id):
+            return False
+        tipo = self.tipo_en_cola.pop(npc_id, None)
+        if tipo is not None:
+            self.ociosos_por_tipo[casa][tipo].quitar(npc_id)
+        return True
     
-    def registrar_npc_ocioso(self, npc_id: int):
-        """Registra un NPC sin tarea en el deque"""
-        if npc_id not in self.cola_npcs_ociosos:
-            self.cola_npcs_ociosos.append(npc_id)
+    def _afinidad(self, npc_id: int, tipo: TipoTarea) -> str:
+        """Qué tan bien encaja el oficio del NPC con la tarea: oficio, afin o cualquiera"""
+        tipo_npc = OFICIO_A_TIPOTAREA.get(self.oficio_por_npc.get(npc_id))
+        if tipo_npc is tipo:
+            return "oficio"
+        if tipo_npc is not None and tipo_npc in TIPOS_AFINES.get(tipo, ()):
+            return "afin"
+        return "cualquiera"
     
-    def asignar_tareas_automaticamente(self, casas_dict=None) -> List[Tuple[int, Tarea, Optional[str]]]:
+    def _siguiente_ocioso(self, casa: str, tipo: TipoTarea) -> int:
         """
-        Asigna tareas a NPCs ociosos automáticamente
-        Retorna: Lista de tuplas (npc_id, tarea, mensaje_error_opcional)
+        Saca al ocioso más indicado para una tarea de `tipo`: primero del oficio
+        exacto, luego de un oficio afín y, si no hay, el siguiente de la cola
         """
-        asignaciones = []
-        tareas_rechazadas_consecutivas = 0
-        max_rechazos = min(len(self.cola_npcs_ociosos), self.heap_tareas.size(), 100)
-        
-        while self.cola_npcs_ociosos and not self.heap_tareas.is_empty():
-            # 🛡️ Protección contra bucle infinito
-            if tareas_rechazadas_consecutivas >= max_rechazos:
-                # Todas las tareas disponibles fueron rechazadas, salir del bucle
-                break
-            
-            # Obtener NPC ocioso (FIFO con deque)
-            npc_id = self.cola_npcs_ociosos.popleft()
+        baldes = self.ociosos_por_tipo.get(casa)
+        if baldes:
+            for nivel, candidato in enumerate((tipo,) + TIPOS_AFINES.get(tipo, ())):
+                balde = baldes.get(candidato)
+                if balde:
+                    npc_id = balde.primero()
+                    self._quitar_ocioso(npc_id, casa)
+                    self.asignaciones_por_oficio["oficio" if nivel == 0 else "afin"] += 1
+                    return npc_id
+        npc_id = self.ociosos_por_casa[casa].primero()
+        self._quitar_ocioso(npc_id, casa)
+        self.asignaciones_por_oficio["cualquiera"] += 1
+        return npc_id
+    
+    def tareas_pendientes(self, casa: Optional[str] = None) -> int:
+        """Tareas pendientes de una casa (o de todas)"""
+        if casa is not None:
+            heap = self.tareas_por_casa.get(casa)
+            return heap.size() if heap is not None else 0
+        return sum(heap.size() for heap in self.tareas_por_casa.values())
+    
+    def npcs_ociosos(self, casa: Optional[str] = None) -> int:
+        """NPCs en cola de ociosos de una casa (o de todas)"""
+        if casa is not None:
+            return len(self.ociosos_por_casa.get(casa, ()))
+        return sum(len(cola) for cola in self.ociosos_por_casa.values())
+    
+    def _paso_asignacion(self, casa: str, casas_dict, rechazadas: List[Tarea],
+                         asignaciones: List[Tuple[int, Optional[Tarea], Optional[str]]]) -> bool:
+        """
+        Intenta UNA asignación en la casa. Las tareas que no se pueden iniciar se
+        apartan (vuelven al heap al final de la ronda) y se prueba la siguiente.
+        Retorna False cuando la casa ya no puede asignar nada más en esta ronda.
+        """
+        heap = self.tareas_por_casa.get(casa)
+        cola = self.ociosos_por_casa.get(casa)
+        while cola and heap:
+            tarea = heap.pop()
             
-            # Obtener tarea de mayor prioridad (heap)
-            tarea = self.heap_tareas.pop()
+            # 🆕 Verificar recursos si se proporcionó diccionario de casas
+            if casas_dict and tarea.casa in casas_dict:
+                puede_iniciar, mensaje = self.puede_iniciar_tarea(tarea, casas_dict[tarea.casa])
+                if not puede_iniciar:
+                    rechazadas.append(tarea)
+                    asignaciones.append((cola.primero(), None, mensaje))
+                    continue
             
-            if tarea:
-                # 🆕 Verificar recursos si se proporcionó diccionario de casas
-                mensaje_error = None
-                if casas_dict and tarea.casa in casas_dict:
-                    casa = casas_dict[tarea.casa]
-                    puede_iniciar, mensaje = self.puede_iniciar_tarea(tarea, casa)
-                    
-                    if not puede_iniciar:
-                        # No se puede iniciar - devolver tarea al heap CON prioridad
-                        prioridad_heap = 10 - tarea.prioridad
-                        self.heap_tareas.push(tarea, priority=prioridad_heap)
-                        mensaje_error = mensaje
-                        asignaciones.append((npc_id, None, mensaje_error))
-                        # NPC vuelve a estar ocioso
-                        self.registrar_npc_ocioso(npc_id)
-                        tareas_rechazadas_consecutivas += 1
-                        continue
-                
-                # Asignar tarea exitosamente - resetear contador
-                tarea.asignado_a = npc_id
-                self.tareas_activas[npc_id] = tarea
-                asignaciones.append((npc_id, tarea, None))
-                tareas_rechazadas_consecutivas = 0
+            # Obtener NPC ocioso: del oficio de la tarea si hay, si no el siguiente de la cola
+            npc_id = self._siguiente_ocioso(casa, tarea.tipo)
+            tarea.asignado_a = npc_id
+            self.tareas_activas[npc_id] = tarea
+            asignaciones.append((npc_id, tarea, None))
+            return True
+        return False
+    
+    def _matriz_costos(self, npcs: List[int], tareas: List[Tarea]) -> np.ndarray:
+        """Costo de cada par NPC x tarea: caminata + desajuste de oficio - prioridad"""
+        costos = np.empty((len(npcs), len(tareas)))
+        for i, npc_id in enumerate(npcs):
+            for j, tarea in enumerate(tareas):
+                costos[i, j] = COSTO_AFINIDAD[self._afinidad(npc_id, tarea.tipo)]
+        costos -= PESO_PRIORIDAD * np.array([t.prioridad for t in tareas], dtype=np.float64)
+        
+        if self.posicion_npc is not None:
+            origenes = np.array([self.posicion_npc(npc_id) for npc_id in npcs], dtype=np.float64)
+            destinos = np.array([t.ubicacion for t in tareas], dtype=np.float64)
+            distancias = np.hypot(origenes[:, None, 0] - destinos[None, :, 0],
+                                  origenes[:, None, 1] - destinos[None, :, 1])
+            # Tareas sin ubicación: el NPC elige el lugar, no hay caminata que comparar
+            distancias[:, (destinos == 0).all(axis=1)] = 0.0
+            costos += distancias / DISTANCIA_POR_PUNTO
+        return costos
+    
+    def _lote_asignacion(self, casa: str, casas_dict, rechazadas: List[Tarea],
+                         asignaciones: List[Tuple[int, Optional[Tarea], Optional[str]]]) -> bool:
+        """
+        🧠 Asignación óptima de un lote de la casa: hasta MAX_LOTE_ASIGNACION
+        ociosos (en orden de cola) contra las tareas más prioritarias, resuelto
+        con el método húngaro. Retorna False si no se pudo asignar nada.
+        """
+        heap = self.tareas_por_casa.get(casa)
+        cola = self.ociosos_por_casa.get(casa)
+        if not cola or not heap:
+            return False
+        npcs = cola.primeros(MAX_LOTE_ASIGNACION)
+        tareas: List[Tarea] = []
+        while heap and len(tareas) < MAX_LOTE_ASIGNACION:
+            tarea = heap.pop()
+            if casas_dict and tarea.casa in casas_dict:
+                puede_iniciar, mensaje = self.puede_iniciar_tarea(tarea, casas_dict[tarea.casa])
+                if not puede_iniciar:
+                    rechazadas.append(tarea)
+                    asignaciones.append((npcs[0], None, mensaje))
+                    continue
+            tareas.append(tarea)
+        if not tareas:
+            return False
+        
+        usadas = set()
+        for fila, columna in asignar_minimo_costo(self._matriz_costos(npcs, tareas)):
+            npc_id, tarea = npcs[fila], tareas[columna]
+            self._quitar_ocioso(npc_id, casa)
+            self.asignaciones_por_oficio[self._afinidad(npc_id, tarea.tipo)] += 1
+            tarea.asignado_a = npc_id
+            self.tareas_activas[npc_id] = tarea
+            asignaciones.append((npc_id, tarea, None))
+            usadas.add(columna)
+        # Las que sobraron (más tareas que ociosos) siguen pendientes
+        self.agregar_tareas([t for j, t in enumerate(tareas) if j not in usadas])
+        return True
+    
+    def asignar_tareas_automaticamente(self, casas_dict=None, casa: Optional[str] = None) -> List[Tuple[int, Tarea, Optional[str]]]:
+        """
+        Asigna tareas a NPCs ociosos automáticamente (solo de `casa` si se indica).
+        Con varias casas reparte por turnos: una asignación por casa y vuelta
+        (o un lote óptimo por casa y vuelta si `asignacion_optima` está activa).
+        Retorna: Lista de tuplas (npc_id, tarea, mensaje_error_opcional)
+        """
+        paso = self._lote_asignacion if self.asignacion_optima else self._paso_asignacion
+        asignaciones = []
+        rechazadas: List[Tarea] = []
+        if casa is not None:
+            pendientes = deque([casa])
+        else:
+            # La casa que abrió esta ronda pasa al final de la siguiente
+            pendientes = deque(self.turno_casas)
+            self.turno_casas.rotate(-1)
         
+        while pendientes:
+            actual = pendientes.popleft()
+            if paso(actual, casas_dict, rechazadas, asignaciones):
+                pendientes.append(actual)
+        
+        # Las rechazadas vuelven a su heap CON prioridad para la próxima ronda
+        self.agregar_tareas(rechazadas)
         return asignaciones
     
     def actualizar_progreso(self, npc_id: int, incremento: float = 0.1):
@@ -405,13 +724,27 @@ class GestorTareas:
             tarea = self.tareas_activas[npc_id]
             del self.tareas_activas[npc_id]
             
-            # NPC vuelve a estar ocioso
-            self.registrar_npc_ocioso(npc_id)
+            # NPC vuelve a estar ocioso (en la casa de la tarea)
+            self.registrar_npc_ocioso(npc_id, tarea.casa)
             
             return tarea
         
         return None
     
+    def fallar_tarea(self, npc_id: int) -> Optional[Tarea]:
+        """
+        El NPC perdió su tarea sin terminarla: la tarea vuelve a pendientes (sus
+        recursos ya se pagaron) y quien llama decide dónde queda ocioso el NPC
+        """
+        tarea = self.tareas_activas.pop(npc_id, None)
+        if tarea is None:
+            return None
+        tarea.asignado_a = None
+        tarea.progreso = 0.0
+        self.agregar_tarea(tarea)
+        self.marcar_casa(tarea.casa)
+        return tarea
+    
     def reasignar_si_necesario(self, casa: str):
         """
         Reasigna tareas si cambian las necesidades críticas
@@ -441,27 +774,24 @@ class GestorTareas:
                 
                 # Crear nueva tarea crítica
                 tipo_critico = random.choice(tareas_criticas_tipos)
-                nueva_tarea = Tarea(
-                    tipo=tipo_critico,
-                    prioridad=10,  # Máxima prioridad
-                    duracion_semanas=self._duracion_por_tipo(tipo_critico),
-                    asignado_a=npc_id,
-                    casa=casa,
-                    oro_ganado=self._recompensa_oro(tipo_critico),
-                    comida_ganada=self._recompensa_comida(tipo_critico),
-                    madera_ganada=self._recompensa_madera(tipo_critico),
-                    experiencia=15
-                )
+                nueva_tarea = self._nueva_tarea(tipo_critico, 10, casa,  # Máxima prioridad
+                                                experiencia=15, con_costo=False)
+                nueva_tarea.asignado_a = npc_id
                 
                 self.tareas_activas[npc_id] = nueva_tarea
     
     def obtener_estadisticas(self) -> Dict:
         """Obtiene estadísticas del gestor"""
         return {
-            "tareas_pendientes": self.heap_tareas.size(),
+            "tareas_pendientes": self.tareas_pendientes(),
             "tareas_activas": len(self.tareas_activas),
-            "npcs_ociosos": len(self.cola_npcs_ociosos),
-            "casas_monitoreadas": len(self.estados_casas)
+            "npcs_ociosos": self.npcs_ociosos(),
+            "npcs_descansando": len(self.descansando),
+            "casas_monitoreadas": len(self.estados_casas),
+            "asignaciones_por_oficio": dict(self.asignaciones_por_oficio),
+            # Salud de los heaps: marcas de removido pendientes y compactaciones
+            "heap_marcas": sum(h.get_stats()["dead"] for h in self.tareas_por_casa.values()),
+            "heap_compactaciones": sum(h.get_stats()["compactions"] for h in self.tareas_por_casa.values())
         }
     
     def obtener_tarea_activa(self, npc_id: int) -> Optional[Tarea]:
@@ -470,46 +800,53 @@ class GestorTareas:
     
     def hay_npcs_ociosos(self) -> bool:
         """Verifica si hay NPCs sin tarea"""
-        return len(self.cola_npcs_ociosos) > 0
+        return any(self.ociosos_por_casa.values())
     
     def registrar_oficio_npc(self, npc_id: int, oficio_nombre: str):
         """
         🚀 OPTIMIZACIÓN: Registra el oficio de un NPC en el índice
-        Permite acceso O(1) a NPCs por oficio
+        Permite acceso O(1) a NPCs por oficio (alta y baja en sets)
         """
         # Remover del oficio anterior si existía
-        if npc_id in self.oficio_por_npc:
-            oficio_anterior = self.oficio_por_npc[npc_id]
-            if oficio_anterior in self.npcs_por_oficio:
-                if npc_id in self.npcs_por_oficio[oficio_anterior]:
-                    self.npcs_por_oficio[oficio_anterior].remove(npc_id)
+        oficio_anterior = self.oficio_por_npc.get(npc_id)
+        if oficio_anterior is not None:
+            self.npcs_por_oficio.get(oficio_anterior, set()).discard(npc_id)
         
         # Agregar al nuevo oficio
-        if oficio_nombre not in self.npcs_por_oficio:
-            self.npcs_por_oficio[oficio_nombre] = []
-        
-        if npc_id not in self.npcs_por_oficio[oficio_nombre]:
-            self.npcs_por_oficio[oficio_nombre].append(npc_id)
-        
+        self.npcs_por_oficio.setdefault(oficio_nombre, set()).add(npc_id)
         self.oficio_por_npc[npc_id] = oficio_nombre
+        
+        # Si está esperando tarea, pasa al balde de su nuevo oficio
+        casa = self.casa_por_npc.get(npc_id)
+        if oficio_anterior != oficio_nombre and casa is not None and self._quitar_ocioso(npc_id, casa):
+            self.registrar_npc_ocioso(npc_id, casa)
     
-    def obtener_npcs_por_oficio(self, oficio_nombre: str) -> List[int]:
+    def obtener_npcs_por_oficio(self, oficio_nombre: str) -> Set[int]:
         """
         🚀 OPTIMIZACIÓN: Obtiene NPCs con un oficio específico en O(1)
         En lugar de filtrar toda la lista de NPCs
         """
-        return self.npcs_por_oficio.get(oficio_nombre, [])
+        return self.npcs_por_oficio.get(oficio_nombre, set())
+    
+    def remover_npc(self, npc_id: int):
+        """
+        Da de baja a un NPC muerto: sale de su cola de ociosos en O(1), del índice
+        de oficios y suelta su tarea activa (los recursos ya se consumieron)
+        """
+        casa = self.casa_por_npc.pop(npc_id, None)
+        if casa is not None:
+            self._quitar_ocioso(npc_id, casa)
+        self.descansando.remove(npc_id)
+        self.tareas_activas.pop(npc_id, None)
+        self.remover_npc_del_indice(npc_id)
     
     def remover_npc_del_indice(self, npc_id: int):
         """
         🚀 OPTIMIZACIÓN: Remueve NPC del índice (cuando muere o cambia de estado)
         """
-        if npc_id in self.oficio_por_npc:
-            oficio = self.oficio_por_npc[npc_id]
-            if oficio in self.npcs_por_oficio:
-                if npc_id in self.npcs_por_oficio[oficio]:
-                    self.npcs_por_oficio[oficio].remove(npc_id)
-            del self.oficio_por_npc[npc_id]
+        oficio = self.oficio_por_npc.pop(npc_id, None)
+        if oficio is not None:
+            self.npcs_por_oficio.get(oficio, set()).discard(npc_id)
     
     def forzar_asignacion_completa(self, npcs_disponibles: List[int], casa: str, casas_dict=None):
         """
@@ -518,14 +855,24 @@ class GestorTareas:
         Retorna: Lista de tuplas (npc_id, tarea, mensaje_error_opcional)
         OPTIMIZADO: Limita generación de tareas y evita bucles infinitos
         """
-        # Agregar todos los NPCs al deque si no están ya
+        # Agregar todos los NPCs a la cola de la casa si no están ya (pertenencia O(1))
+        cola = self._cola_casa(casa)
         for npc_id in npcs_disponibles:
-            if npc_id not in self.tareas_activas and npc_id not in self.cola_npcs_ociosos:
-                self.registrar_npc_ocioso(npc_id)
+            if npc_id not in self.tareas_activas and npc_id not in cola:
+                self.registrar_npc_ocioso(npc_id, casa)
+        return self.asignar_casa(casa, casas_dict)
+    
+    def asignar_casa(self, casa: str, casas_dict=None):
+        """
+        Ronda de una casa con los ociosos que ya tiene en cola: genera las tareas
+        que falten y las reparte.
+        Retorna: Lista de tuplas (npc_id, tarea, mensaje_error_opcional)
+        """
+        cola = self._cola_casa(casa)
         
-        # Generar tareas suficientes (OPTIMIZADO: máximo 100 tareas pendientes)
-        npcs_sin_tarea = len(self.cola_npcs_ociosos)
-        tareas_pendientes = self.heap_tareas.size()
+        # Generar tareas suficientes (OPTIMIZADO: máximo 100 tareas pendientes por casa)
+        npcs_sin_tarea = len(cola)
+        tareas_pendientes = self.tareas_pendientes(casa)
         
         if npcs_sin_tarea > 0 and tareas_pendientes < 100:
             # Generar solo las tareas necesarias, máximo 50 por vez
@@ -541,33 +888,22 @@ class GestorTareas:
                 comida_disponible = getattr(casa_obj, 'comida', 1000)
                 tiene_pocos_recursos = madera_disponible < 100 or comida_disponible < 100
             
+            # 🚀 OPTIMIZACIÓN: todo lo invariante fuera del lazo de generación
+            necesidad = estado_casa.obtener_necesidad_critica() if estado_casa else NecesidadCasa.NORMAL
+            prioridad_de = {tipo: self._calcular_prioridad_dinamica(tipo, necesidad) for tipo in TIPOS_TAREA}
+            nueva_tarea = self._nueva_tarea
+            
+            nuevas = []
             for _ in range(tareas_a_generar):
                 # Si tiene pocos recursos, priorizar tareas que no cuestan recursos
                 if tiene_pocos_recursos and random.random() < 0.7:
-                    # Tareas que generan recursos sin costo
-                    tipos_gratis = [TipoTarea.MINERIA, TipoTarea.AGRICULTURA, TipoTarea.CAZA, 
-                                   TipoTarea.PESCA, TipoTarea.COMERCIO, TipoTarea.GUARDIA]
-                    tipo_tarea = random.choice(tipos_gratis)
+                    tipo_tarea = random.choice(TIPOS_SIN_COSTO)
                 else:
-                    tipo_tarea = random.choice(list(TipoTarea))
-                
-                necesidad = estado_casa.obtener_necesidad_critica() if estado_casa else NecesidadCasa.NORMAL
-                prioridad = self._calcular_prioridad_dinamica(tipo_tarea, necesidad)
-                
-                tarea = Tarea(
-                    tipo=tipo_tarea,
-                    prioridad=prioridad,
-                    duracion_semanas=self._duracion_por_tipo(tipo_tarea),
-                    casa=casa,
-                    oro_ganado=self._recompensa_oro(tipo_tarea),
-                    comida_ganada=self._recompensa_comida(tipo_tarea),
-                    madera_ganada=self._recompensa_madera(tipo_tarea),
-                    costo_madera=self._costo_madera(tipo_tarea),  # 🆕
-                    costo_comida=self._costo_comida(tipo_tarea),  # 🆕
-                    experiencia=10
-                )
-                
-                self.agregar_tarea(tarea)
+                    tipo_tarea = random.choice(TIPOS_TAREA)
+                nuevas.append(nueva_tarea(tipo_tarea, prioridad_de[tipo_tarea], casa))
+            
+            # 🚀 OPTIMIZACIÓN: Un solo heapify O(n) en vez de n inserciones O(log n)
+            self.agregar_tareas(nuevas)
         
-        # Asignar tareas con validación de recursos
-        return self.asignar_tareas_automaticamente(casas_dict)
+        # Asignar tareas con validación de recursos (solo trabajo de esta casa)
+        return self.asignar_tareas_automaticamente(casas_dict, casa)